@@ -1,4 +1,4 @@
-from flask import Flask, render_template, redirect, url_for, session, request
+from flask import Flask, render_template, redirect, url_for, session, request, jsonify
 import firebase_admin
 from firebase_admin import credentials
 from dotenv import load_dotenv
@@ -23,6 +23,11 @@ app.secret_key = os.getenv("SECRET_KEY", "dev_secret_key_123")
 app.config['SESSION_TYPE'] = 'filesystem' 
 app.config['PERMANENT_SESSION_LIFETIME'] = 3600 
 
+# Upload cap: Werkzeug rejects a larger body with 413 before it is received and
+# spooled. The resume is the largest upload; 1 MB of headroom covers the form fields.
+from utils.resume_extractor import MAX_RESUME_BYTES
+app.config['MAX_CONTENT_LENGTH'] = MAX_RESUME_BYTES + 1024 * 1024
+
 # --- CRITICAL FIX: Set Debug explicitly here ---
 # This ensures the scheduler check below works correctly
 app.debug = True 
@@ -90,6 +95,11 @@ try:
     app.register_blueprint(hod_bp, url_prefix='/hod')
     app.register_blueprint(placement_bp, url_prefix='/placement')
     app.register_blueprint(interview_bp, url_prefix='/interview')
+
+    # Load the resume NLP model in the background (serving process only, like the scheduler)
+    if not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        from utils.resume_analyzer import warm_up_nlp
+        warm_up_nlp()
 except Exception as e:
     import traceback
     traceback.print_exc()
@@ -112,6 +122,13 @@ def index():
             
     return redirect(url_for('auth.login'))
 
+@app.errorhandler(413)
+def request_too_large(e):
+    message = f"Upload is too large (max {MAX_RESUME_BYTES // (1024 * 1024)} MB)."
+    if '/api/' in request.path or request.accept_mimetypes.best == 'application/json':
+        return jsonify({"error": message}), 413
+    return message, 413
+
 # 8. Prevent Browser Caching
 @app.after_request
 def add_header(response):
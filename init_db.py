@@ -1,6 +1,7 @@
 import firebase_admin
 from firebase_admin import credentials, firestore, auth
 from datetime import datetime, timedelta, timezone
+from utils.placement_stats import recompute_stats
 
 # 1. Initialize Firebase
 if not firebase_admin._apps:
@@ -138,6 +139,7 @@ def init_database():
         'deadline': datetime.now(timezone.utc) + timedelta(days=10),
         'posted_by': "demo_po_1",
         'status': "active",
+        'created_at': firestore.SERVER_TIMESTAMP,
         'eligibility_criteria': {
             'min_cgpa': 6.0,
             'max_backlogs': 0,
@@ -166,7 +168,8 @@ def init_database():
         'type': "internal_task",
         'reference_id': drive_id,
         'deadline': datetime.now(timezone.utc) + timedelta(days=2),
-        'created_at': firestore.SERVER_TIMESTAMP
+        'created_at': firestore.SERVER_TIMESTAMP,
+        'submitted_student_ids': ['demo_student_1']  # Submission index (utils/submission_index.py)
     })
 
     # Submission
@@ -200,6 +203,9 @@ def init_database():
         'timestamp': firestore.SERVER_TIMESTAMP
     })
 
+    print("6. Computing Placement Stats...")
+    recompute_stats(db)
+
     print("\n✅ Initialization Complete!")
     print("   You can now login with:")
     print("   - student@prepai.com / password123")
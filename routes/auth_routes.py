@@ -3,6 +3,7 @@ import firebase_admin
 from firebase_admin import auth, firestore
 import requests
 import os
+from utils.placement_stats import count_user
 
 auth_bp = Blueprint('auth', __name__)
 db = firestore.client()
@@ -154,6 +155,7 @@ def register():
                 user_data['managed_department'] = 'MCA'
 
             db.collection('users').document(user.uid).set(user_data)
+            count_user(db, role)
 
             flash("Registration successful! Please login.", "success")
             return redirect(url_for('auth.login'))
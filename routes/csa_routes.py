@@ -4,6 +4,10 @@ from datetime import datetime, timedelta
 import io
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
+from utils.firestore_repo import get_docs_by_ids, query_in
+from utils.submission_index import submitted_ids, submissions_by_student, SUBMITTED_FIELD
+from utils.drive_deadlines import active_drive_docs
+from utils.pagination import paginate_filtered, page_size_arg, message_page
 
 csa_bp = Blueprint('csa', __name__)
 db = firestore.client()
@@ -27,13 +31,10 @@ def get_csa_batch_ids(user_id):
     for b in batches_query:
         seen_batch_ids.add(b.id)
 
-    # 2. Legacy/Profile Fetch (Backup)
-    if managed_batch_ids:
-        for b_id in managed_batch_ids:
-            if b_id not in seen_batch_ids:
-                doc_ref = db.collection('batches').document(b_id).get()
-                if doc_ref.exists:
-                    seen_batch_ids.add(doc_ref.id)
+    # 2. Legacy/Profile Fetch (Backup) - one batched read for all of them
+    legacy_ids = [b_id for b_id in managed_batch_ids if b_id not in seen_batch_ids]
+    if legacy_ids:
+        seen_batch_ids.update(get_docs_by_ids(db, 'batches', legacy_ids, field_paths=['batch_name']))
                     
     return list(seen_batch_ids)
 
@@ -103,11 +104,11 @@ def dashboard():
         my_batches = []
         total_students = 0
         
-        # Fetch Batch Details
+        # Fetch Batch Details (single batched read)
+        batch_docs = get_docs_by_ids(db, 'batches', all_my_batch_ids)
         for b_id in all_my_batch_ids:
-            b_ref = db.collection('batches').document(b_id).get()
-            if b_ref.exists:
-                b_data = b_ref.to_dict()
+            if b_id in batch_docs:
+                b_data = batch_docs[b_id]
                 b_data['id'] = b_id
                 my_batches.append(b_data)
                 total_students += b_data.get('student_count', 0)
@@ -197,10 +198,8 @@ def download_report():
         if d_date and d_date < now:
             batch_id = t_data.get('assigned_to_batch')
             batch_students = [s for s in students if s.to_dict().get('batch_id') == batch_id]
-            missing = []
-            for bs in batch_students:
-                sub = db.collection('assignments').document(t.id).collection('submissions').document(bs.id).get()
-                if not sub.exists: missing.append(bs.to_dict().get('full_name'))
+            done = submitted_ids(db, t.id, t_data)
+            missing = [bs.to_dict().get('full_name') for bs in batch_students if bs.id not in done]
             if missing:
                 missed_tasks_report.append({'title': t_data.get('title'), 'deadline': deadline, 'defaulters': missing})
 
@@ -224,13 +223,10 @@ def students():
     # Realistically a CSA won't have > 10 batches.
     query = db.collection('users').where('role', '==', 'student').where('batch_id', 'in', my_batches[:10])
     
-    # Handle Department Filter (POST)
-    if request.method == 'POST':
-        dept = request.form.get('department')
-        if dept: query = query.where('department', '==', dept)
-    
-    results = query.stream()
-    students_list = []
+    # Handle Department Filter (POST form, or query string on "load more")
+    dept = request.values.get('department')
+    if dept: query = query.where('department', '==', dept)
+    skills = request.values.get('skills')
     
     # Handle Risk Filter (GET)
     filter_type = request.args.get('filter')
@@ -241,9 +237,8 @@ def students():
     if filter_type == 'risk':
         page_title = "⚠️ Risk Alerts: Inactive Students"
 
-    for doc in results:
+    def matches(doc):
         data = doc.to_dict()
-        data['id'] = doc.id
         
         # --- RISK FILTER LOGIC ---
         if filter_type == 'risk':
@@ -261,21 +256,34 @@ def students():
                 except: pass
             
             # If the student IS active, we SKIP them (because we only want Inactive ones)
-            if is_active: continue 
+            if is_active: return False
 
         # --- SKILLS FILTER LOGIC ---
-        if request.method == 'POST':
-            skills = request.form.get('skills')
-            if skills:
-                req_skills = [s.strip().lower() for s in skills.split(',')]
-                user_skills = [s.lower() for s in data.get('skills', [])]
-                if not any(item in user_skills for item in req_skills): continue
-
+        if skills:
+            req_skills = [s.strip().lower() for s in skills.split(',')]
+            user_skills = [s.lower() for s in data.get('skills', [])]
+            if not any(item in user_skills for item in req_skills): return False
+        return True
+
+    # One page of matching students at a time (risk/skills are checked here, so
+    # further batches are read until the page is full)
+    results, next_token = paginate_filtered(db, query, matches, request.args.get('page_token'),
+                                            page_size_arg(request.args.get('page_size')))
+    students_list = []
+    for doc in results:
+        data = doc.to_dict()
+        data['id'] = doc.id
         students_list.append(data)
 
+    next_page_url = None
+    if next_token:
+        next_page_url = url_for('csa.students', page_token=next_token, filter=filter_type,
+                                department=dept or None, skills=skills or None)
+
     return render_template('csa/students.html', 
                          user=session['user'], 
                          students=students_list, 
+                         next_page_url=next_page_url,
                          page_title=page_title) # Pass title to template
 
 # --- 4. TASK MANAGER ---
@@ -289,50 +297,25 @@ def task_manager():
     
     my_tasks = []
     if my_batch_ids:
-        # Filter: Tasks assigned to my batches (Created by ME or Placement Officer)
-        try:
-            # 1. Try Optimized Query (Needs Index)
-            # We fetch all active assignments for these batches
-            # The filtering of 'who created it' happens partially here (assigned_to_batch is the key)
-            tasks_ref = db.collection('assignments')\
-                .where('assigned_to_batch', 'in', my_batch_ids[:10])\
-                .order_by('created_at', direction=firestore.Query.DESCENDING).stream()
-                
-            for t in tasks_ref:
-                data = t.to_dict()
-                data['id'] = t.id
-                
-                # Logic: Show if created by ME or (Created by Placement AND assigned to my batch)
-                # Since we filtered by 'assigned_to_batch', we just need to differentiate for Editing rights
-                # Actually, the requirement: "we only need assignements that are posted by the Placement officer and the the current CSA"
-                # So if another CSA posted it (unlikely if scoped by batch, but possible), we might want to exclude?
-                # For now, we assume if it's assigned to MY batch, I should see it.
-                
-                my_tasks.append(data)
-                
-        except Exception:
-            # 2. Fallback: Fetch without Sort
-            print("Task Query Fallback: Index missing, sorting in memory.")
-            tasks_ref = db.collection('assignments')\
-                .where('assigned_to_batch', 'in', my_batch_ids[:10]).stream()
-                
-            for t in tasks_ref:
-                data = t.to_dict()
-                data['id'] = t.id
-                my_tasks.append(data)
-            
-            my_tasks.sort(key=lambda x: x.get('created_at', datetime.min) if x.get('created_at') else datetime.min, reverse=True)
+        # Filter: Tasks assigned to my batches (Created by ME or Placement Officer).
+        # Chunked 'in' queries cover every batch (not just the first 10); sorting happens
+        # in memory, so no composite index is needed.
+        tasks_ref = query_in(db.collection('assignments'), 'assigned_to_batch', my_batch_ids)
+        for t in tasks_ref:
+            data = t.to_dict()
+            data['id'] = t.id
+            my_tasks.append(data)
+        
+        # timestamp() so tz-aware Firestore times and tasks missing created_at compare cleanly
+        my_tasks.sort(key=lambda x: x['created_at'].timestamp() if hasattr(x.get('created_at'), 'timestamp') else 0, reverse=True)
 
-    now = datetime.now()
-    drives_ref = db.collection('placement_drives').where('deadline', '>=', now.strftime('%Y-%m-%d')).stream()
-    active_drives = [{'id': d.id, **d.to_dict()} for d in drives_ref]
+    # Timestamp range on the normalized deadline (the old string comparison never matched timestamp deadlines)
+    active_drives = [{'id': d.id, **d.to_dict()} for d in active_drive_docs(db)]
     
     # Populate dropdown with ONLY my batches
-    my_batches_list = []
-    for b_id in my_batch_ids:
-        b_ref = db.collection('batches').document(b_id).get()
-        if b_ref.exists:
-            my_batches_list.append({'id': b_id, 'name': b_ref.to_dict().get('batch_name')})
+    batch_docs = get_docs_by_ids(db, 'batches', my_batch_ids, field_paths=['batch_name'])
+    my_batches_list = [{'id': b_id, 'name': batch_docs[b_id].get('batch_name')}
+                       for b_id in my_batch_ids if b_id in batch_docs]
 
     return render_template('csa/tasks.html', user=session['user'], tasks=my_tasks, drives=active_drives, batches=my_batches_list)
 
@@ -351,7 +334,8 @@ def create_task():
             'created_by': session['user']['uid'],
             'created_at': firestore.SERVER_TIMESTAMP,
             'type': 'assignment', 
-            'status': 'active'
+            'status': 'active',
+            SUBMITTED_FIELD: []
         }
         db.collection('assignments').add(data)
         flash("Task created successfully!", "success")
@@ -374,7 +358,8 @@ def repost_drive(drive_id):
             'created_at': firestore.SERVER_TIMESTAMP,
             'type': 'repost', 
             'linked_drive_id': drive_id,
-            'status': 'active'
+            'status': 'active',
+            SUBMITTED_FIELD: []
         }
         db.collection('assignments').add(data)
         flash(f"Drive reposted!", "success")
@@ -440,19 +425,8 @@ def get_chat(user_id):
     participants = sorted([current, user_id])
     conv_id = f"{participants[0]}_{participants[1]}"
     
-    msgs_ref = db.collection('conversations').document(conv_id).collection('messages')\
-                 .order_by('timestamp').stream()
-    
-    result = []
-    for m in msgs_ref:
-        d = m.to_dict()
-        # Map 'content' (DB) back to 'message' (Frontend expectation)
-        result.append({
-            'sender_id': d.get('sender_id'),
-            'message': d.get('content'), 
-            'timestamp': d.get('timestamp')
-        })
-    return jsonify(result)
+    # Newest page first; next_page_token loads older messages
+    return jsonify(message_page(db, conv_id, request.args.get('page_token')))
 
 @csa_bp.route('/api/messages', methods=['POST'])
 def send_chat():
@@ -531,20 +505,20 @@ def view_submissions(task_id):
         # Fetch Students in Batch
         students_ref = db.collection('users').where('batch_id', '==', batch_id).where('role', '==', 'student').stream()
         students_data = []
+        # All submissions of the task in one query
+        submissions = submissions_by_student(db, task_id)
         
         for s in students_ref:
             s_dict = s.to_dict()
             student_id = s.id
             
             # Check Submission Status
-            submission_ref = db.collection('assignments').document(task_id).collection('submissions').document(student_id).get()
-            
             status = 'pending'
             file_url = '#'
             submitted_at = None
             
-            if submission_ref.exists:
-                sub_data = submission_ref.to_dict()
+            if student_id in submissions:
+                sub_data = submissions[student_id]
                 status = 'submitted'
                 file_url = sub_data.get('file_url') or sub_data.get('link') or sub_data.get('submission_link') or '#'
                 submitted_at = sub_data.get('submitted_at')
@@ -3,6 +3,9 @@ from firebase_admin import firestore, auth
 from datetime import datetime
 from reportlab.pdfgen import canvas
 import os
+from utils.gemini_quota import get_quota_state
+from utils.placement_stats import get_stats, increment, count_user
+from utils.pagination import paginate, page_size_arg, message_page
 
 hod_bp = Blueprint('hod', __name__)
 db = firestore.client()
@@ -19,36 +22,19 @@ def dashboard():
     if not check_hod_role(): return redirect(url_for('auth.login'))
     
     try:
-        # 1. Fetch Real-time Stats
-        batches = list(db.collection('batches').stream())
-        batches_count = len(batches)
+        # 1. Fetch Stats (one materialized document, see utils/placement_stats)
+        stats = get_stats(db)
         
-        staff = list(db.collection('users').where('role', '==', 'csa').stream())
-        csa_count = len(staff)
-        
-        students = list(db.collection('users').where('role', '==', 'student').stream())
-        students_count = len(students)
-        
-        # 2. Get Recent Batches for the table
-        batches_data = []
-        for b in batches:
-            d = b.to_dict()
-            d['id'] = b.id
-            batches_data.append(d)
-            
-        # Sort logic: Recent first
-        recent_batches = sorted(
-            batches_data, 
-            key=lambda x: x.get('created_at', datetime.min) if x.get('created_at') else datetime.min, 
-            reverse=True
-        )[:5]
+        # 2. Get Recent Batches for the table (only the 5 shown)
+        batches_ref = db.collection('batches').order_by('created_at', direction=firestore.Query.DESCENDING).limit(5).stream()
+        recent_batches = [{'id': b.id, **b.to_dict()} for b in batches_ref]
 
         return render_template('hod/dashboard.html', 
                              user=session['user'],
                              stats={
-                                 'batches': batches_count, 
-                                 'csa': csa_count, 
-                                 'students': students_count
+                                 'batches': stats['batches'], 
+                                 'csa': stats['csa'], 
+                                 'students': stats['students']
                              },
                              recent_batches=recent_batches)
                              
@@ -75,7 +61,10 @@ def batches():
             }
             
             # 2. Save Batch to Firestore (Merge allows update)
-            db.collection('batches').document(batch_id).set(batch_data, merge=True)
+            batch_ref = db.collection('batches').document(batch_id)
+            is_new = not batch_ref.get().exists
+            batch_ref.set(batch_data, merge=True)
+            if is_new: increment(db, 'batches')
             
             # 3. If CSA is assigned, update the CSA's profile
             if batch_data['csa_id']:
@@ -105,7 +94,10 @@ def batches():
 def delete_batch(batch_id):
     if not check_hod_role(): return redirect(url_for('auth.login'))
     try:
-        db.collection('batches').document(batch_id).delete()
+        batch_ref = db.collection('batches').document(batch_id)
+        if batch_ref.get().exists:
+            batch_ref.delete()
+            increment(db, 'batches', -1)
         flash('Batch deleted successfully.', 'success')
     except Exception as e:
         flash(f"Error deleting batch: {e}", "error")
@@ -164,6 +156,7 @@ def staff():
                     'reports_to_hod': session['user']['uid'], 
                     'created_at': firestore.SERVER_TIMESTAMP
                 })
+                count_user(db, 'csa')
                 flash(f'CSA Account created for {name}. Share the password.', 'success')
             
         except Exception as e:
@@ -171,17 +164,22 @@ def staff():
         
         return redirect(url_for('hod.staff'))
 
-    # GET Request: List all CSAs
-    csa_ref = db.collection('users').where('role', '==', 'csa').stream()
-    csa_list = [{'id': u.id, **u.to_dict()} for u in csa_ref]
+    # GET Request: List CSAs, one page at a time
+    query = db.collection('users').where('role', '==', 'csa')
+    csa_docs, next_token = paginate(db, query, request.args.get('page_token'), page_size_arg(request.args.get('page_size')))
+    csa_list = [{'id': u.id, **u.to_dict()} for u in csa_docs]
+    next_page_url = url_for('hod.staff', page_token=next_token) if next_token else None
     
-    return render_template('hod/staff.html', user=session['user'], staff=csa_list)
+    return render_template('hod/staff.html', user=session['user'], staff=csa_list, next_page_url=next_page_url)
 
 @hod_bp.route('/staff/delete/<csa_id>')
 def delete_staff(csa_id):
     if not check_hod_role(): return redirect(url_for('auth.login'))
     try:
-        db.collection('users').document(csa_id).delete()
+        user_ref = db.collection('users').document(csa_id)
+        user_doc = user_ref.get()
+        user_ref.delete()
+        if user_doc.exists: count_user(db, (user_doc.to_dict() or {}).get('role'), -1)
         try:
             auth.delete_user(csa_id)
         except Exception as auth_err:
@@ -267,6 +265,12 @@ def generate_report():
         
     return redirect(url_for('hod.reports'))
 
+# --- AI QUOTA (admin view of the shared Gemini budgets) ---
+@hod_bp.route('/api/ai_quota')
+def ai_quota():
+    if not check_hod_role(): return jsonify({'error': 'Unauthorized'}), 401
+    return jsonify(get_quota_state())
+
 # --- 5. MESSAGES & BROADCAST ---
 @hod_bp.route('/messages')
 def messages():
@@ -301,20 +305,10 @@ def get_messages_api(target_user_id):
         participants = sorted([sender_id, target_user_id])
         conv_id = f"{participants[0]}_{participants[1]}"
         
-        msgs_ref = db.collection('conversations').document(conv_id).collection('messages')\
-                     .order_by('timestamp').limit(50)
-        
-        messages = []
-        for doc in msgs_ref.stream():
-            d = doc.to_dict()
-            messages.append({
-                'sender_id': d.get('sender_id'),
-                'message': d.get('content'),
-                'timestamp': d.get('timestamp')
-            })
-        return jsonify(messages)
+        # Newest page first (this used to return the *oldest* 50); next_page_token loads older messages
+        return jsonify(message_page(db, conv_id, request.args.get('page_token')))
     except:
-        return jsonify([])
+        return jsonify({'messages': [], 'next_page_token': None})
 
 @hod_bp.route('/api/messages', methods=['POST'])
 def send_message():
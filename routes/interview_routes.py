@@ -1,56 +1,20 @@
-from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for
-import os
-import requests
+from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for, Response, stream_with_context
 import json
 from datetime import datetime
+from utils.gemini_client import generate_content, stream_generate_content, extract_text
+from utils.gemini_models import get_model_name
+from utils.streaming import sse_event, SSE_HEADERS, completed_json_fields
+from utils.ai_gateway import coalesce, make_key
 
 interview_bp = Blueprint('interview', __name__)
 
-# Load API Key
-api_key = os.getenv("GEMINI_API_KEY")
-
-# --- SMART MODEL FINDER (Same as Chatbot) ---
-def get_working_model():
-    """Finds the best available model to avoid 404 errors"""
-    try:
-        url = f"https://generativelanguage.googleapis.com/v1beta/models?key={api_key}"
-        response = requests.get(url)
-        
-        if response.status_code == 200:
-            models = response.json().get('models', [])
-            model_names = [m['name'] for m in models]
-            
-            # Priority 1: Gemini 2.5 Flash (What worked yesterday)
-            for m in model_names: 
-                if 'gemini-2.5-flash' in m: return m.split('/')[-1]
-
-            # Priority 2: Gemini 1.5 Flash
-            for m in model_names: 
-                if 'gemini-1.5-flash' in m and 'latest' not in m: return m.split('/')[-1]
-
-            # Priority 3: Any generative model
-            for m in model_names:
-                if 'generateContent' in m.get('supportedGenerationMethods', []):
-                    return m.split('/')[-1]
-                    
-        return "gemini-2.5-flash" # Default fallback
-    except:
-        return "gemini-2.5-flash"
-
-# Set the model ONCE when app starts
-MODEL_NAME = get_working_model()
-print(f"🎤 Mock Interview configured to use: {MODEL_NAME}")
-
 def call_gemini(prompt):
-    """Helper to call Gemini via Direct HTTP"""
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{MODEL_NAME}:generateContent?key={api_key}"
-    headers = {'Content-Type': 'application/json'}
-    data = { "contents": [{ "parts": [{"text": prompt}] }] }
-    
+    """Helper to call Gemini through the shared pooled client"""
     try:
-        response = requests.post(url, headers=headers, json=data)
+        # Same cached model choice as the chatbot (discovered lazily, never at import)
+        response = generate_content(prompt, get_model_name())
         if response.status_code == 200:
-            return response.json()['candidates'][0]['content']['parts'][0]['text']
+            return extract_text(response)
         else:
             return f"Error: {response.text}"
     except Exception as e:
@@ -79,17 +43,17 @@ def generate_question():
     Just output the question.
     """
     
-    question = call_gemini(prompt)
+    # A whole class asking for the same topic at once shares one Gemini call.
+    # ttl=0: only concurrent requests are merged, so "next question" still gets a new one.
+    try:
+        question = coalesce(make_key('interview_question', prompt), lambda: call_gemini(prompt), ttl=0)
+    except Exception as e:
+        question = f"System Error: {str(e)}"
     session['current_question'] = question
     return jsonify({'question': question})
 
-@interview_bp.route('/submit_answer', methods=['POST'])
-def submit_answer():
-    data = request.json
-    user_answer = data.get('answer')
-    question = session.get('current_question', 'Unknown Question')
-    
-    prompt = f"""
+def feedback_prompt(question, user_answer):
+    return f"""
     You are an interviewer evaluating a candidate.
     
     Question: "{question}"
@@ -107,18 +71,51 @@ def submit_answer():
         "model_answer": "..."
     }}
     """
-    
-    response_text = call_gemini(prompt)
-    
+
+def parse_feedback(response_text):
     # Clean up JSON
     try:
         clean_json = response_text.replace('```json', '').replace('```', '').strip()
-        feedback_data = json.loads(clean_json)
+        return json.loads(clean_json)
     except:
-        feedback_data = {
+        return {
             "score": "?", 
             "feedback": response_text, 
             "model_answer": "N/A"
         }
-        
-    return jsonify(feedback_data)
\ No newline at end of file
+
+@interview_bp.route('/submit_answer', methods=['POST'])
+def submit_answer():
+    data = request.json
+    user_answer = data.get('answer')
+    question = session.get('current_question', 'Unknown Question')
+    
+    response_text = call_gemini(feedback_prompt(question, user_answer))
+    return jsonify(parse_feedback(response_text))
+
+@interview_bp.route('/submit_answer/stream', methods=['POST'])
+def submit_answer_stream():
+    """
+    Server-Sent Events version of /submit_answer. The JSON is parsed while it streams:
+    each field is sent as a 'field' event the moment its value is complete (score first),
+    then 'done' carries the full result.
+    """
+    data = request.json
+    prompt = feedback_prompt(session.get('current_question', 'Unknown Question'), data.get('answer'))
+
+    def generate():
+        buffer = ""
+        sent = set()
+        try:
+            for piece in stream_generate_content(prompt, get_model_name()):
+                buffer += piece
+                for key, value in completed_json_fields(buffer).items():
+                    if key in sent: continue
+                    sent.add(key)
+                    yield sse_event({'name': key, 'value': value}, 'field')
+        except Exception as e:
+            if not buffer:
+                buffer = f"System Error: {str(e)}"
+        yield sse_event(parse_feedback(buffer), 'done')
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=SSE_HEADERS)
@@ -1,11 +1,19 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify, send_file, current_app, Response
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify, send_file, current_app, Response, stream_with_context
 from firebase_admin import firestore
 from datetime import datetime
 import io
 import os
 import csv
+import json
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
+from utils.rank_applicants import load_applicants, score_applicants, NO_RESUME_SUMMARY
+from utils.firestore_repo import get_docs_by_ids, query_in, count_query
+from utils.submission_index import submissions_by_student, SUBMITTED_FIELD
+from utils.drive_deadlines import normalize_deadline
+from utils.placement_stats import get_stats, mark_placed
+from utils.applicant_counter import init_counter, applicant_counts, COUNTER_FLAG
+from utils.pagination import paginate, paginate_filtered, page_size_arg, message_page
 
 placement_bp = Blueprint('placement', __name__)
 db = firestore.client()
@@ -24,22 +32,11 @@ def dashboard():
     if not check_placement_role(): return redirect(url_for('auth.login'))
     
     try:
-        # 1. Active Drives
-        drives_ref = db.collection('placement_drives').where('status', '==', 'active')
-        drives = list(drives_ref.stream())
-        drives_count = len(drives)
-        
-        # 2. Students & Placement Rate
-        students_ref = db.collection('users').where('role', '==', 'student')
-        students = list(students_ref.stream())
-        students_count = len(students)
-        
-        placed_students = 0
-        for s in students:
-            data = s.to_dict()
-            # Check for 'placed' status OR the boolean flag
-            if data.get('placement_status') == 'placed' or data.get('is_placed') == True:
-                placed_students += 1
+        # 1-2. Active Drives, Students & Placed (materialized counters + live active-drive count, see utils/placement_stats)
+        stats = get_stats(db)
+        drives_count = stats['active_drives']
+        students_count = stats['students']
+        placed_students = stats['placed_students']
         
         # Calculate Rate
         placement_rate = 0
@@ -92,14 +89,8 @@ def drives():
     if request.method == 'POST':
         try:
             data = request.form
-            deadline_val = data.get('deadline')
-            
-            deadline_ts = deadline_val
-            try:
-                if deadline_val:
-                    deadline_ts = datetime.strptime(deadline_val, '%Y-%m-%d')
-            except:
-                pass
+            # Canonical timestamp (midnight UTC) so active drives can be range-queried
+            deadline_ts = normalize_deadline(data.get('deadline'))
 
             new_drive = {
                 'company_name': data.get('company_name'),
@@ -110,37 +101,38 @@ def drives():
                 'posted_by': session['user']['uid'],
                 'status': 'active',
                 'created_at': firestore.SERVER_TIMESTAMP,
+                COUNTER_FLAG: True,
                 'eligibility_criteria': {
                     'min_cgpa': float(data.get('min_cgpa', 0)),
                     'max_backlogs': int(data.get('max_backlogs', 0)),
                     'allowed_branches': request.form.getlist('departments')
                 }
             }
-            db.collection('placement_drives').add(new_drive)
+            # Drive + its zeroed applicant counter shards in one write
+            drive_ref = db.collection('placement_drives').document()
+            batch = db.batch()
+            batch.set(drive_ref, new_drive)
+            init_counter(batch, drive_ref)
+            batch.commit()
             flash('Drive posted successfully!', 'success')
         except Exception as e:
             flash(f"Error: {e}", "error")
         return redirect(url_for('placement.drives'))
 
-    # Fetch Drives
-    drives_ref = db.collection('placement_drives').stream()
+    # Fetch Drives (newest first, one page at a time)
+    query = db.collection('placement_drives').order_by('created_at', direction=firestore.Query.DESCENDING)
+    drive_docs, next_token = paginate(db, query, request.args.get('page_token'), page_size_arg(request.args.get('page_size')))
+    # Applicant counts from the sharded counters (one read for the whole page)
+    counts = applicant_counts(db, drive_docs)
     drives_list = []
-    for d in drives_ref:
+    for d in drive_docs:
         doc = d.to_dict()
         doc['id'] = d.id
-        apps_ref = d.reference.collection('applicants').get()
-        doc['applicant_count'] = len(apps_ref)
+        doc['applicant_count'] = counts.get(d.id, 0)
         drives_list.append(doc)
-    
-    def get_sort_key(d):
-        ts = d.get('created_at')
-        if ts:
-            return ts.replace(tzinfo=None) if ts.tzinfo else ts
-        return datetime.min 
-        
-    drives_list.sort(key=get_sort_key, reverse=True)
 
-    return render_template('placement/drives.html', user=session['user'], drives=drives_list)
+    next_page_url = url_for('placement.drives', page_token=next_token) if next_token else None
+    return render_template('placement/drives.html', user=session['user'], drives=drives_list, next_page_url=next_page_url)
 
 @placement_bp.route('/drives/<drive_id>')
 def drive_details(drive_id):
@@ -154,11 +146,13 @@ def drive_details(drive_id):
     drive['id'] = drive_id
     
     applicants = []
-    apps_ref = drive_ref.collection('applicants').stream()
-    for doc in apps_ref:
+    apps_docs = list(drive_ref.collection('applicants').stream())
+    # One batched read for all applicant profiles instead of one per applicant
+    students = get_docs_by_ids(db, 'users', [doc.id for doc in apps_docs])
+    for doc in apps_docs:
         app_data = doc.to_dict()
         student_id = doc.id
-        student = db.collection('users').document(student_id).get().to_dict() or {}
+        student = students.get(student_id, {})
         applicants.append({
             'id': student_id,
             'name': student.get('full_name', 'Unknown'),
@@ -189,12 +183,9 @@ def edit_drive(drive_id):
         }
     }
     
-    deadline_str = request.form.get('deadline')
-    if deadline_str:
-        try:
-           update_data['deadline'] = datetime.strptime(deadline_str, '%Y-%m-%d')
-        except ValueError:
-           pass
+    deadline_ts = normalize_deadline(request.form.get('deadline'))
+    if deadline_ts:
+        update_data['deadline'] = deadline_ts
 
     drive_ref.update(update_data)
     flash('Drive updated successfully.', 'success')
@@ -211,10 +202,11 @@ def export_drive_pdf(drive_id):
     drive_data = drive.to_dict()
     
     applicants = []
-    apps_ref = drive_ref.reference.collection('applicants').stream()
-    for doc in apps_ref:
+    apps_docs = list(drive_ref.collection('applicants').stream())
+    students = get_docs_by_ids(db, 'users', [doc.id for doc in apps_docs])
+    for doc in apps_docs:
         data = doc.to_dict()
-        student = db.collection('users').document(doc.id).get().to_dict() or {}
+        student = students.get(doc.id, {})
         applicants.append({
             'name': student.get('full_name', 'Unknown'),
             'email': student.get('email', 'N/A'),
@@ -265,11 +257,12 @@ def export_drive_pdf(drive_id):
 def get_drive_applicants(drive_id):
     if not check_placement_role(): return jsonify({'error': 'Unauthorized'}), 401
     try:
-        applicants_ref = db.collection('placement_drives').document(drive_id).collection('applicants').stream()
+        applicant_docs = list(db.collection('placement_drives').document(drive_id).collection('applicants').stream())
+        students = get_docs_by_ids(db, 'users', [doc.id for doc in applicant_docs])
         results = []
-        for doc in applicants_ref:
+        for doc in applicant_docs:
             data = doc.to_dict()
-            student = db.collection('users').document(doc.id).get().to_dict() or {}
+            student = students.get(doc.id, {})
             results.append({
                 'student_name': student.get('full_name', 'Unknown'),
                 'student_email': student.get('email', 'N/A'),
@@ -281,6 +274,42 @@ def get_drive_applicants(drive_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@placement_bp.route('/api/drives/<drive_id>/rank')
+def rank_drive_applicants(drive_id):
+    """
+    Ranks all applicants by resume fit against the drive's role/description.
+    Streams NDJSON: a 'meta' line right away, one 'applicant' line (with its score)
+    as each resume is scored, then a 'ranking' line with student_ids best first.
+    Scoring runs in this process (no spaCy worker processes in the web server).
+    """
+    if not check_placement_role(): return jsonify({'error': 'Unauthorized'}), 401
+    try:
+        drive, applicants = load_applicants(db, drive_id)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    if drive is None: return jsonify({'error': 'Drive not found'}), 404
+
+    def generate():
+        yield json.dumps({'type': 'meta', 'drive_id': drive_id, 'company_name': drive.get('company_name'),
+                          'role_title': drive.get('role_title'), 'applicants': len(applicants)}) + "\n"
+        scores = []
+        try:
+            for applicant, result in score_applicants(drive, applicants, workers=1):
+                row = {k: v for k, v in applicant.items() if k != 'resume_text'}
+                if result is None:
+                    row.update(score=None, summary=NO_RESUME_SUMMARY)
+                else:
+                    row.update(score=result['score'], summary=result['summary'])
+                    scores.append((result['score'], applicant['student_id']))
+                yield json.dumps(dict(row, type='applicant'), default=str) + "\n"
+            scores.sort(key=lambda pair: pair[0], reverse=True)
+            yield json.dumps({'type': 'ranking', 'order': [student_id for _, student_id in scores]}) + "\n"
+        except Exception as e:
+            print(f"Ranking error ({drive_id}): {e}")
+            yield json.dumps({'type': 'error', 'error': str(e)}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 # =====================================================
 # 3. STUDENT FILTER & EXPORT
 # =====================================================
@@ -291,40 +320,50 @@ def students():
     students_list = []
     query = db.collection('users').where('role', '==', 'student')
     
-    dept = request.form.get('department')
-    if request.method == 'POST' and dept:
+    # Filters come from the POST form, or the query string on "load more"
+    dept = request.values.get('department')
+    if dept:
         query = query.where('department', '==', dept)
     
     min_cgpa = 0.0
     required_skills = []
     
-    if request.method == 'POST':
-        try: min_cgpa = float(request.form.get('cgpa_min', 0))
-        except: pass
-        
-        s_in = request.form.get('skills', '')
-        if s_in: required_skills = [s.strip().lower() for s in s_in.split(',') if s.strip()]
-
-    docs = query.stream()
+    try: min_cgpa = float(request.values.get('cgpa_min', 0) or 0)
+    except: pass
     
-    for doc in docs:
+    s_in = request.values.get('skills', '')
+    if s_in: required_skills = [s.strip().lower() for s in s_in.split(',') if s.strip()]
+
+    def matches(doc):
         s = doc.to_dict()
-        s['id'] = doc.id
-        
         try: scgpa = float(s.get('cgpa', 0) or 0)
         except: scgpa = 0.0
         
-        if scgpa < min_cgpa: continue
+        if scgpa < min_cgpa: return False
         
         if required_skills:
             raw = s.get('skills', [])
             uskills = set()
             if isinstance(raw, list): uskills = {str(k).lower() for k in raw}
-            if not all(req in uskills for req in required_skills): continue
-            
+            if not all(req in uskills for req in required_skills): return False
+        return True
+
+    # One page of matching students at a time (CGPA/skills are checked here, so
+    # further batches are read until the page is full)
+    docs, next_token = paginate_filtered(db, query, matches, request.args.get('page_token'),
+                                         page_size_arg(request.args.get('page_size')))
+    
+    for doc in docs:
+        s = doc.to_dict()
+        s['id'] = doc.id
         students_list.append(s)
+
+    next_page_url = None
+    if next_token:
+        next_page_url = url_for('placement.students', page_token=next_token, department=dept or None,
+                                cgpa_min=request.values.get('cgpa_min') or None, skills=s_in or None)
         
-    return render_template('placement/students.html', user=session['user'], students=students_list)
+    return render_template('placement/students.html', user=session['user'], students=students_list, next_page_url=next_page_url)
 
 @placement_bp.route('/students/export', methods=['POST'])
 def export_students_pdf():
@@ -397,10 +436,7 @@ def add_manual_placement():
         
         # 2. Update User Profile Status ONLY if verified
         if initial_status == 'verified':
-            student_ref.update({
-                'placement_status': 'placed',
-                'is_placed': True
-            })
+            mark_placed(db, student_id)  # Profile flag + placed_students counter, in one transaction
             flash(f"Successfully marked {student_data.get('full_name')} as placed!", "success")
         
     except Exception as e:
@@ -422,10 +458,7 @@ def approve_placement(placement_id):
         p_ref.update({'status': 'verified'})
         
         # Update Student Profile
-        db.collection('users').document(p_data['student_id']).update({
-            'placement_status': 'placed',
-            'is_placed': True
-        })
+        mark_placed(db, p_data['student_id'])  # Profile flag + placed_students counter, in one transaction
         
         flash("Placement approved successfully.", "success")
     except Exception as e:
@@ -515,7 +548,8 @@ def tasks():
             'assigned_to_batch': request.form.get('batch_id'),
             'deadline': request.form.get('deadline'),
             'status': 'active',
-            'created_at': firestore.SERVER_TIMESTAMP
+            'created_at': firestore.SERVER_TIMESTAMP,
+            SUBMITTED_FIELD: []
         })
         flash('Task assigned!', 'success')
         return redirect(url_for('placement.tasks'))
@@ -578,16 +612,17 @@ def view_submissions(task_id):
         
         students_ref = db.collection('users').where('batch_id', '==', task_data.get('assigned_to_batch')).where('role', '==', 'student').stream()
         students_data = []
+        # All submissions of the task in one query
+        submissions = submissions_by_student(db, task_id)
         
         for s in students_ref:
             s_dict = s.to_dict()
-            sub_ref = db.collection('assignments').document(task_id).collection('submissions').document(s.id).get()
             
             status = 'pending'
             file_url = '#'
             submitted_at = None
-            if sub_ref.exists:
-                sub_data = sub_ref.to_dict()
+            if s.id in submissions:
+                sub_data = submissions[s.id]
                 status = 'submitted'
                 file_url = sub_data.get('file_url') or sub_data.get('link') or sub_data.get('submission_link') or '#'
                 submitted_at = sub_data.get('submitted_at')
@@ -632,14 +667,9 @@ def get_messages_api(target_user_id):
         participants = sorted([sender_id, target_user_id])
         conv_id = f"{participants[0]}_{participants[1]}"
         
-        msgs = db.collection('conversations').document(conv_id).collection('messages')\
-                 .order_by('timestamp').limit(50).stream()
-        
-        data = [{'sender_id': m.to_dict().get('sender_id'), 
-                 'message': m.to_dict().get('content'), 
-                 'timestamp': m.to_dict().get('timestamp')} for m in msgs]
-        return jsonify(data)
-    except: return jsonify([])
+        # Newest page first; next_page_token loads older messages
+        return jsonify(message_page(db, conv_id, request.args.get('page_token')))
+    except: return jsonify({'messages': [], 'next_page_token': None})
 
 @placement_bp.route('/api/messages', methods=['POST'])
 def send_message():
@@ -690,19 +720,17 @@ def view_placements():
              if csa_doc.exists:
                  batch_ids = csa_doc.to_dict().get('managed_batch_ids', [])
         
-        if batch_ids:
-            # Firestore 'in' query supports max 10
-            # proper way is to use 'in' for chunks or just filter in python if list is small
-            # For reported issue, we assume 1 or small number of batches
-            query = query.where('batch_id', 'in', batch_ids[:10])
-        else:
+        if not batch_ids:
             # No batches assigned? View empty
             return render_template('staff/placement_list.html', user=session['user'], placements=[], role=role)
             
-    # Placement Officer sees ALL (no filter added)
+        # Chunked 'in' queries, so every batch is covered (not just the first 10)
+        placements_ref = query_in(query, 'batch_id', batch_ids)
+    else:
+        # Placement Officer sees ALL (no filter added)
+        placements_ref = query.stream()
     
     # 2. Fetch Data
-    placements_ref = query.stream()
     placements_list = []
     
     for p in placements_ref:
@@ -744,10 +772,12 @@ def generate_report():
         
         c.drawString(50, 680, "Summary:")
         if report_type == 'placement_stats':
-            c.drawString(50, 660, "Active Drives: " + str(len(list(db.collection('placement_drives').where('status', '==', 'active').stream()))))
-            c.drawString(50, 640, "Total Students: " + str(len(list(db.collection('users').where('role', '==', 'student').stream()))))
+            stats = get_stats(db)
+            c.drawString(50, 660, "Active Drives: " + str(stats['active_drives']))
+            c.drawString(50, 640, "Total Students: " + str(stats['students']))
+            c.drawString(50, 620, "Placed Students: " + str(stats['placed_students']))
         elif report_type == 'task_completion':
-            c.drawString(50, 660, "Active Tasks: " + str(len(list(db.collection('assignments').stream()))))
+            c.drawString(50, 660, "Active Tasks: " + str(count_query(db.collection('assignments'))))
             
         c.save()
         
@@ -1,17 +1,29 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify, Response, stream_with_context
 from firebase_admin import firestore
 from datetime import datetime
-from utils.ai_helper import get_rag_response
+from utils.ai_helper import get_rag_response, stream_rag_response
 import os
-import requests
 import json
-import io
-from pypdf import PdfReader  # Make sure to run: pip install pypdf
-from utils.resume_analyzer import analyze_resume_custom
+from utils.resume_analyzer import analyze_resume_custom, job_description_for_drive, scoring_version
+from utils.resume_extractor import extract_resume_text, resume_digest, MAX_RESUME_BYTES, RESUME_TEXT_FIELD, MAX_STORED_RESUME_CHARS
+from utils.submission_index import record_submission, submitted_ids, SUBMITTED_FIELD
+from utils.firestore_repo import existing_paths
+from utils.drive_deadlines import active_drive_docs, format_deadline
+from utils.applicant_counter import record_application
+from utils.pagination import message_page
+from utils import fanout
+from utils.gemini_client import generate_content, stream_generate_content, extract_text
+from utils.streaming import sse_event, SSE_HEADERS
+from utils.ai_gateway import coalesce, make_key
+from utils import ai_cache
+from utils.gemini_quota import available_models
+from utils import job_queue
 
 student_bp = Blueprint('student', __name__)
 db = firestore.client()
 api_key = os.getenv("GEMINI_API_KEY")
+# Prioritize Gemini 2.5 Flash as requested, then fallbacks
+TOOL_MODELS = ["gemini-2.5-flash", "gemini-1.5-flash", "gemini-1.5-pro"]
 
 # --- HELPER: Strict Role Check ---
 def check_student_role():
@@ -22,24 +34,32 @@ def check_student_role():
 def call_gemini_api(prompt):
     """
     Directly calls Gemini API for tools (Roadmap, Resume, etc.).
-    Prioritizes Gemini 2.5 Flash as requested, then falls back to 1.5 Flash and Pro.
+    Identical prompts in flight at the same time share one upstream call (see ai_gateway).
     """
+    try:
+        return coalesce(make_key('tools', prompt), lambda: _call_gemini_models(prompt))
+    except Exception as e:
+        print(f"AI gateway error: {e}")
+        return None
+
+def _call_gemini_models(prompt):
+    """Tries TOOL_MODELS in priority order, skipping any the quota manager knows are exhausted."""
     if not api_key:
         print("Error: GEMINI_API_KEY not found in environment variables.")
         return None
 
-    # Prioritize Gemini 2.5 Flash as requested, then fallbacks
-    models_to_try = ["gemini-2.5-flash", "gemini-1.5-flash", "gemini-1.5-pro"]
-    
-    headers = {'Content-Type': 'application/json'}
-    data = { "contents": [{ "parts": [{"text": prompt}] }] }
+    # Skip models that are out of budget or cooling down after a 429
+    models_to_try = available_models(TOOL_MODELS, prompt)
+    if not models_to_try:
+        print("All Gemini models are out of quota right now.")
+        return None
 
     for model in models_to_try:
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={api_key}"
         try:
-            response = requests.post(url, headers=headers, json=data)
+            # One retry per model; we have other models to fall back to
+            response = generate_content(prompt, model, max_retries=1)
             if response.status_code == 200:
-                return response.json()['candidates'][0]['content']['parts'][0]['text']
+                return extract_text(response)
             elif response.status_code == 429: # Quota limit
                 print(f"Quota exceeded for {model}, trying next...")
                 continue
@@ -50,6 +70,52 @@ def call_gemini_api(prompt):
             
     return None
 
+# --- HELPER: Streaming Gemini Call (same model fallbacks as call_gemini_api) ---
+def stream_gemini_api(prompt):
+    """
+    Yields text pieces as Gemini generates them. Falls back to the next model only
+    while nothing has been sent yet; raises RuntimeError if no model could answer.
+    """
+    if not api_key:
+        raise RuntimeError("GEMINI_API_KEY not found in environment variables.")
+
+    for model in available_models(TOOL_MODELS, prompt):
+        started = False
+        try:
+            for piece in stream_generate_content(prompt, model, max_retries=1):
+                started = True
+                yield piece
+            return
+        except Exception as e:
+            if started: raise
+            print(f"Streaming error ({model}): {e}")
+
+    raise RuntimeError("All Gemini models unavailable")
+
+# --- HELPER: Cache Bypass ---
+def wants_fresh(data=None):
+    """True when the client asked to skip the AI cache (?fresh=1 or "fresh": true in the body)."""
+    if request.args.get('fresh') in ('1', 'true'): return True
+    return bool((data or {}).get('fresh'))
+
+def parse_json_reply(response):
+    cleaned_response = response.replace('```json', '').replace('```', '').strip()
+    return json.loads(cleaned_response)
+
+# --- HELPER: Background Jobs for AI Tools ---
+def wants_async(data=None):
+    """True when the page asked for a job ID instead of waiting (?async=1 or "async": true)."""
+    if request.args.get('async') in ('1', 'true'): return True
+    return bool((data or {}).get('async'))
+
+def enqueue_tool(kind, fn, *args):
+    """Runs a tool function on the job queue. fn(*args) -> (payload, http_status)."""
+    if not check_student_role(): return jsonify({"error": "Unauthorized"}), 403
+    job_id = job_queue.submit(kind, session['user']['uid'], fn, *args)
+    if not job_id:
+        return jsonify({"error": "AI tools are busy right now. Please try again in a moment."}), 503
+    return jsonify({"job_id": job_id, "status": "queued"}), 202
+
 # ==========================================
 #  1. DASHBOARD & CORE ROUTES
 # ==========================================
@@ -70,9 +136,9 @@ def get_student_tasks(user_id, batch_id):
             
             if t_data.get('status', 'active') != 'active': continue
 
-            # Check submission
-            sub_ref = db.collection('assignments').document(t.id).collection('submissions').document(user_id).get()
-            t_data['is_submitted'] = sub_ref.exists
+            # Check submission (from the task's submitted set, no per-task submission read)
+            t_data['is_submitted'] = user_id in submitted_ids(db, t.id, t_data)
+            t_data.pop(SUBMITTED_FIELD, None)
             tasks.append(t_data)
             
         tasks.sort(key=lambda x: x.get('deadline', ''))
@@ -88,57 +154,43 @@ def get_active_drives(user_id):
     # drives.append({'id': 'debug', 'company': 'Debug Tech', 'role': 'Test Role', 'ctc': '10LPA', 'date': '2025-12-31', 'has_applied': False})
     
     try:
-        drives_ref = db.collection('placement_drives').stream()
-        current_time_str = datetime.now().strftime('%Y-%m-%d')
+        # Expired drives are filtered by Firestore (normalized deadline range query)
+        drives_ref = active_drive_docs(db)
+        open_drives = []
 
         for d in drives_ref:
             try:
                 doc = d.to_dict()
                 doc['id'] = d.id
-                
-                # 1. Expiry Check (Handle Strings and Timestamps)
                 deadline = doc.get('deadline')
-                is_expired = False
-                
-                if deadline:
-                    deadline_str = ""
-                    # Convert Timestamp/Datetime to YYYY-MM-DD String
-                    if hasattr(deadline, 'strftime'):
-                        deadline_str = deadline.strftime('%Y-%m-%d')
-                    else:
-                        deadline_str = str(deadline)
-                        
-                    if deadline_str < current_time_str:
-                        is_expired = True
-
-                if is_expired: continue
-
-                # 2. Applied Status
-                has_applied = False
-                try:
-                    # Check sub-collection
-                    app_ref = d.reference.collection('applicants').document(user_id).get()
-                    if app_ref.exists: has_applied = True
-                except: pass
-
-                # 3. Robust Field Mapping
+
+                # 1. Robust Field Mapping
                 role = doc.get('role_title') or doc.get('role') or doc.get('job_role') or doc.get('title') or 'Open Role'
                 
                 drives.append({
                     'company': doc.get('company_name', 'Unknown Company'),
                     'role': role,
                     'ctc': doc.get('package', 'Not Disclosed'),
-                    'date': str(deadline) if deadline else 'Open',
+                    'date': format_deadline(deadline),
                     'id': d.id,
                     'description': doc.get('description', ''),
                     'created_at': doc.get('created_at'),
-                    'has_applied': has_applied
+                    'has_applied': False
                 })
+                open_drives.append(d.reference.collection('applicants').document(user_id))
             except Exception as e:
                 print(f"Skipping corrupt drive doc {d.id}: {e}")
                 continue
+
+        # 2. Applied Status: one batched lookup of applicants/{uid} across all open drives
+        try:
+            applied = existing_paths(db, open_drives)
+            for drive, app_ref in zip(drives, open_drives):
+                drive['has_applied'] = app_ref.path in applied
+        except Exception as e:
+            print(f"Applied-status lookup failed: {e}")
             
-        drives.sort(key=lambda x: x.get('created_at') if x.get('created_at') else datetime.min, reverse=True)
+        drives.sort(key=lambda x: x['created_at'].timestamp() if hasattr(x.get('created_at'), 'timestamp') else 0, reverse=True)
         
     except Exception as e:
         print(f"Error fetching drives: {e}")
@@ -150,21 +202,29 @@ def get_active_drives(user_id):
 #  1. DASHBOARD & CORE ROUTES
 # ==========================================
 
+# --- HELPER: Dashboard Data (parallel reads) ---
+def load_dashboard_data(user_id):
+    """
+    (user_data, active_tasks, drives) with the independent reads run concurrently.
+    Drives start right away; tasks start as soon as the profile gives us the batch.
+    """
+    user_future = fanout.submit(lambda: db.collection('users').document(user_id).get().to_dict() or {})
+    drives_future = fanout.submit(get_active_drives, user_id)
+
+    user_data = fanout.result_or(user_future, {}, "profile read")
+    tasks_future = fanout.submit(get_student_tasks, user_id, user_data.get('batch_id'))
+
+    # Both helpers already swallow their own errors and return []
+    return user_data, fanout.result_or(tasks_future, [], "tasks read"), fanout.result_or(drives_future, [], "drives read")
+
 @student_bp.route('/dashboard')
 def dashboard():
     if not check_student_role(): return redirect(url_for('auth.login'))
     
     user_id = session['user']['uid']
     
-    # 1. Fetch User Profile
-    user_ref = db.collection('users').document(user_id)
-    user_doc = user_ref.get()
-    user_data = user_doc.to_dict()
-    batch_id = user_data.get('batch_id')
-
-    # 2. Fetch Data using Helpers
-    active_tasks = get_student_tasks(user_id, batch_id)
-    drives = get_active_drives(user_id)
+    # 1-2. Profile, tasks and drives (fetched in parallel)
+    user_data, active_tasks, drives = load_dashboard_data(user_id)
 
     # 3. Calculate Stats
     pending_count = sum(1 for t in active_tasks if not t['is_submitted'])
@@ -226,18 +286,8 @@ def get_chat(user_id):
     participants = sorted([current, user_id])
     conv_id = f"{participants[0]}_{participants[1]}"
     
-    msgs_ref = db.collection('conversations').document(conv_id).collection('messages')\
-                 .order_by('timestamp').stream()
-    
-    result = []
-    for m in msgs_ref:
-        d = m.to_dict()
-        result.append({
-            'sender_id': d.get('sender_id'),
-            'message': d.get('content'), 
-            'timestamp': d.get('timestamp')
-        })
-    return jsonify(result)
+    # Newest page first; next_page_token loads older messages
+    return jsonify(message_page(db, conv_id, request.args.get('page_token')))
 
 @student_bp.route('/api/messages', methods=['POST'])
 def send_chat():
@@ -291,7 +341,7 @@ def submit_task(task_id):
             'submitted_at': firestore.SERVER_TIMESTAMP,
             'status': 'submitted'
         }
-        db.collection('assignments').document(task_id).collection('submissions').document(session['user']['uid']).set(sub_data)
+        record_submission(db, task_id, session['user']['uid'], sub_data)
         flash("Submitted successfully!", "success")
     except Exception as e:
         flash(f"Error: {e}", "error")
@@ -303,17 +353,15 @@ def apply_drive(drive_id):
     try:
         user_id = session['user']['uid']
         user_name = session['user']['full_name']
-        drive_ref = db.collection('placement_drives').document(drive_id)
-        applicant_ref = drive_ref.collection('applicants').document(user_id)
-        
-        if applicant_ref.get().exists:
-            flash("Already applied.", "info")
-        else:
-            applicant_ref.set({
-                'student_id': user_id, 'name': user_name,
-                'applied_at': firestore.SERVER_TIMESTAMP, 'status': 'applied'
-            })
+        # Application + applicant counter in one transaction (see utils/applicant_counter)
+        applied = record_application(db, drive_id, user_id, {
+            'student_id': user_id, 'name': user_name,
+            'applied_at': firestore.SERVER_TIMESTAMP, 'status': 'applied'
+        })
+        if applied:
             flash("Applied successfully!", "success")
+        else:
+            flash("Already applied.", "info")
     except Exception as e:
         flash(f"Error: {e}", "error")
     return redirect(url_for('student.dashboard'))
@@ -334,21 +382,37 @@ def chat_api():
     user_message = data.get('message', '')
     if not user_message: return jsonify({"response": "Please say something!"})
     
+    # Optional scope: 'syllabus', 'college_info', ... (empty = search everything)
+    scope = data.get('scope') or None
+    
     # Uses the hybrid RAG helper we fixed earlier
-    ai_reply = get_rag_response(user_message)
+    ai_reply = get_rag_response(user_message, doc_type=scope)
     return jsonify({"response": ai_reply})
 
+@student_bp.route('/api/chat/stream', methods=['POST'])
+def chat_stream_api():
+    """Server-Sent Events version of /api/chat: 'token' events as the answer is generated, then 'done'."""
+    if not check_student_role(): return jsonify({"error": "Unauthorized"}), 403
+    data = request.json
+    user_message = data.get('message', '')
+    scope = data.get('scope') or None
+
+    def generate():
+        if not user_message:
+            yield sse_event({'text': "Please say something!"}, 'token')
+        else:
+            for piece in stream_rag_response(user_message, doc_type=scope):
+                yield sse_event({'text': piece}, 'token')
+        yield sse_event({}, 'done')
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=SSE_HEADERS)
+
 @student_bp.route('/api/notifications')
 def get_notifications_api():
     if not check_student_role(): return jsonify([])
     
     user_id = session['user']['uid']
-    # We need batch_id to get tasks
-    user_ref = db.collection('users').document(user_id).get()
-    batch_id = user_ref.to_dict().get('batch_id')
-    
-    active_tasks = get_student_tasks(user_id, batch_id)
-    drives = get_active_drives(user_id)
+    _, active_tasks, drives = load_dashboard_data(user_id)
     
     alerts = []
     
@@ -383,13 +447,7 @@ def roadmap():
     if not check_student_role(): return redirect(url_for('auth.login'))
     return render_template('student/ai/roadmap.html')
 
-@student_bp.route('/api/generate_roadmap', methods=['POST'])
-def api_roadmap():
-    data = request.json
-    topic = data.get('topic')
-    duration = data.get('duration')
-    level = data.get('level')
-
+def run_roadmap(topic, duration, level, fresh=False):
     prompt = f"""
     Create a structured study roadmap for '{topic}'.
     Duration: {duration}
@@ -404,16 +462,26 @@ def api_roadmap():
     Do not add markdown formatting.
     """
     
-    response = call_gemini_api(prompt)
-    if not response:
-        return jsonify({"error": "AI Service unavailable. Please try again later."}), 503
+    def generate():
+        response = call_gemini_api(prompt)
+        return parse_json_reply(response) if response else None
 
     try:
-        cleaned_response = response.replace('```json', '').replace('```', '').strip()
-        roadmap_data = json.loads(cleaned_response)
-        return jsonify({"roadmap": roadmap_data})
+        roadmap_data = ai_cache.cached('roadmap', prompt, generate, bypass=fresh)
     except:
-        return jsonify({"error": "Failed to generate roadmap"}), 500
+        return {"error": "Failed to generate roadmap"}, 500
+    if roadmap_data is None:
+        return {"error": "AI Service unavailable. Please try again later."}, 503
+    return {"roadmap": roadmap_data}, 200
+
+@student_bp.route('/api/generate_roadmap', methods=['POST'])
+def api_roadmap():
+    data = request.json
+    args = (data.get('topic'), data.get('duration'), data.get('level'), wants_fresh(data))
+    if wants_async(data): return enqueue_tool('roadmap', run_roadmap, *args)
+
+    payload, status = run_roadmap(*args)
+    return jsonify(payload), status
 
 # --- B. NOTE SUMMARIZER ---
 @student_bp.route('/ai/summarizer')
@@ -421,12 +489,8 @@ def summarizer():
     if not check_student_role(): return redirect(url_for('auth.login'))
     return render_template('student/ai/summarizer.html')
 
-@student_bp.route('/api/summarize', methods=['POST'])
-def api_summarize():
-    data = request.json
-    text = data.get('text')
-    
-    prompt = f"""
+def summary_prompt(text):
+    return f"""
     Summarize the following study notes. 
     Use bullet points for key concepts. 
     Make it concise but comprehensive for exam revision.
@@ -434,12 +498,52 @@ def api_summarize():
     Notes:
     {text[:5000]}
     """
-    
-    summary = call_gemini_api(prompt)
+
+def run_summary(text, fresh=False):
+    prompt = summary_prompt(text)
+    summary = ai_cache.cached('summary', prompt, lambda: call_gemini_api(prompt), bypass=fresh)
     if not summary:
-        return jsonify({"error": "AI Service unavailable. Please try again later."}), 503
-        
-    return jsonify({"summary": summary})
+        return {"error": "AI Service unavailable. Please try again later."}, 503
+    return {"summary": summary}, 200
+
+@student_bp.route('/api/summarize', methods=['POST'])
+def api_summarize():
+    data = request.json
+    args = (data.get('text'), wants_fresh(data))
+    if wants_async(data): return enqueue_tool('summary', run_summary, *args)
+
+    payload, status = run_summary(*args)
+    return jsonify(payload), status
+
+@student_bp.route('/api/summarize/stream', methods=['POST'])
+def api_summarize_stream():
+    """Server-Sent Events version of /api/summarize: 'token' events, then 'done' (or 'error')."""
+    data = request.json
+    prompt = summary_prompt(data.get('text'))
+    summary = None if wants_fresh(data) else ai_cache.get('summary', prompt)
+
+    def generate():
+        if summary:
+            yield sse_event({'text': summary}, 'token')
+            yield sse_event({}, 'done')
+            return
+        pieces = []
+        try:
+            for piece in stream_gemini_api(prompt):
+                pieces.append(piece)
+                yield sse_event({'text': piece}, 'token')
+            text = "".join(pieces)
+            if not text.strip():
+                # e.g. a safety-blocked reply with no parts: nothing worth caching
+                yield sse_event({'error': "The AI returned an empty summary. Please try again."}, 'error')
+                return
+            ai_cache.put('summary', prompt, text)
+            yield sse_event({}, 'done')
+        except Exception as e:
+            print(f"Summarizer stream failed: {e}")
+            yield sse_event({'error': "AI Service unavailable. Please try again later."}, 'error')
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=SSE_HEADERS)
 
 # --- C. QUIZ GENERATOR ---
 @student_bp.route('/ai/quiz')
@@ -447,13 +551,7 @@ def quiz():
     if not check_student_role(): return redirect(url_for('auth.login'))
     return render_template('student/ai/quiz.html')
 
-@student_bp.route('/api/quizgen', methods=['POST'])
-def api_quizgen():
-    data = request.json
-    text = data.get('text')
-    difficulty = data.get('difficulty', 'Medium')
-    count = data.get('question_count', 5)
-    
+def run_quiz(text, difficulty='Medium', count=5, fresh=False):
     prompt = f"""
     Generate {count} {difficulty} multiple-choice questions based on this text:
     "{text[:3000]}"
@@ -469,16 +567,26 @@ def api_quizgen():
     Do not add markdown formatting.
     """
     
-    response = call_gemini_api(prompt)
-    if not response:
-        return jsonify({"error": "AI Service unavailable. Please try again later."}), 503
+    def generate():
+        response = call_gemini_api(prompt)
+        return parse_json_reply(response) if response else None
 
     try:
-        cleaned_response = response.replace('```json', '').replace('```', '').strip()
-        quiz_data = json.loads(cleaned_response)
-        return jsonify({"quiz": quiz_data})
+        quiz_data = ai_cache.cached('quiz', prompt, generate, bypass=fresh)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return {"error": str(e)}, 500
+    if quiz_data is None:
+        return {"error": "AI Service unavailable. Please try again later."}, 503
+    return {"quiz": quiz_data}, 200
+
+@student_bp.route('/api/quizgen', methods=['POST'])
+def api_quizgen():
+    data = request.json
+    args = (data.get('text'), data.get('difficulty', 'Medium'), data.get('question_count', 5), wants_fresh(data))
+    if wants_async(data): return enqueue_tool('quiz', run_quiz, *args)
+
+    payload, status = run_quiz(*args)
+    return jsonify(payload), status
 
 # --- D. RESUME ANALYZER (PDF) ---
 @student_bp.route('/resume_analysis')
@@ -486,6 +594,54 @@ def resume_analysis():
     if not check_student_role(): return redirect(url_for('auth.login'))
     return render_template('student/ai/resume_analysis.html')
 
+def drive_job_description(drive_id):
+    """Role title + description of a placement drive, used as the resume scoring target."""
+    if not drive_id: return None
+    try:
+        drive = db.collection('placement_drives').document(drive_id).get().to_dict() or {}
+    except Exception as e:
+        print(f"Drive lookup error: {e}")
+        return None
+    return job_description_for_drive(drive)
+
+def save_resume_text(user_id, resume_text):
+    """Keeps the student's latest resume text on their profile for drive ranking."""
+    try:
+        db.collection('users').document(user_id).update({
+            RESUME_TEXT_FIELD: resume_text[:MAX_STORED_RESUME_CHARS],
+            'resume_text_updated': firestore.SERVER_TIMESTAMP
+        })
+    except Exception as e:
+        print(f"⚠️ Could not save resume text for {user_id}: {e}")
+
+def run_resume_analysis(pdf_bytes, job_description=None, user_id=None):
+    try:
+        # 1. Read PDF from memory (text cached by file hash; size/page limits enforced)
+        digest = resume_digest(pdf_bytes)
+        resume_text, error = extract_resume_text(pdf_bytes, digest)
+        if error:
+            message, status = error
+            return {"error": message}, status
+        if user_id:
+            save_resume_text(user_id, resume_text)
+
+        # 2. Same file + same target as before -> cached analysis, no scoring at all
+        cache_key = f"{digest}\n{scoring_version()}\n{job_description or ''}"
+        cached_result = ai_cache.get('resume_analysis', cache_key)
+        if cached_result is not None:
+            return cached_result, 200
+            
+        # 3. Pass the extracted text to our custom ML Algorithm
+        analysis_result = analyze_resume_custom(resume_text, job_description)
+        ai_cache.put('resume_analysis', cache_key, analysis_result)
+        
+        # 4. Return the JSON structure the frontend expects
+        return analysis_result, 200
+        
+    except Exception as e:
+        print(f"PDF Analysis Error: {e}")
+        return {"error": "Could not analyze PDF. Ensure it is a valid text-based PDF."}, 500
+
 @student_bp.route('/api/analyze_resume', methods=['POST'])
 def api_analyze_resume():
     if not check_student_role(): 
@@ -498,19 +654,24 @@ def api_analyze_resume():
     if file.filename == '':
         return jsonify({"error": "No file selected"}), 400
 
-    try:
-        # 1. Read PDF from memory (No database storage required)
-        pdf_reader = PdfReader(io.BytesIO(file.read()))
-        resume_text = ""
-        for page in pdf_reader.pages:
-            resume_text += page.extract_text() + "\n"
-            
-        # 2. Pass the extracted text to our custom ML Algorithm
-        analysis_result = analyze_resume_custom(resume_text)
-        
-        # 3. Return the JSON structure the frontend expects
-        return jsonify(analysis_result)
-        
-    except Exception as e:
-        print(f"PDF Analysis Error: {e}")
-        return jsonify({"error": "Could not analyze PDF. Ensure it is a valid text-based PDF."}), 500
\ No newline at end of file
+    # The upload is read here; the job only gets the bytes.
+    # MAX_CONTENT_LENGTH (app.py) already rejects oversized bodies before they are
+    # received; this byte check is only a second line of defence for the file itself.
+    pdf_bytes = file.read(MAX_RESUME_BYTES + 1)
+    if len(pdf_bytes) > MAX_RESUME_BYTES:
+        return jsonify({"error": f"Resume is too large (max {MAX_RESUME_BYTES // (1024 * 1024)} MB)."}), 413
+    # Optional: score against a specific placement drive instead of the default profile
+    job_description = drive_job_description(request.form.get('drive_id'))
+    user_id = session['user']['uid']
+    if wants_async(): return enqueue_tool('resume', run_resume_analysis, pdf_bytes, job_description, user_id)
+
+    payload, status = run_resume_analysis(pdf_bytes, job_description, user_id)
+    return jsonify(payload), status
+
+@student_bp.route('/api/jobs/<job_id>')
+def get_job_status(job_id):
+    """Polled by the AI tool pages: {status: queued|running|done, result, http_status}."""
+    if not check_student_role(): return jsonify({"error": "Unauthorized"}), 403
+    job = job_queue.get_job(job_id, session['user']['uid'])
+    if not job: return jsonify({"error": "Job not found or expired"}), 404
+    return jsonify(job)
\ No newline at end of file
@@ -0,0 +1,15 @@
+// Shared by the AI tool pages (roadmap, quiz, resume analysis).
+// Submits an AI request as a background job and polls until its result is ready
+async function submitJob(url, options) {
+    const res = await fetch(url + (url.includes('?') ? '&' : '?') + 'async=1', options);
+    const job = await res.json();
+    if (res.status !== 202) return { status: res.status, data: job };
+
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        const poll = await fetch(`/student/api/jobs/${job.job_id}`);
+        const state = await poll.json();
+        if (!poll.ok) return { status: poll.status, data: state };
+        if (state.status === 'done') return { status: state.http_status, data: state.result };
+    }
+}
@@ -0,0 +1,23 @@
+// Shared by the streaming AI pages (chat, summarizer, mock interview).
+// Reads a text/event-stream body and calls onEvent(name, data) for every event
+async function readEvents(res, onEvent) {
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let sep;
+        while ((sep = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, sep);
+            buffer = buffer.slice(sep + 2);
+            let name = 'message', data = '';
+            frame.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) name = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            });
+            onEvent(name, data ? JSON.parse(data) : {});
+        }
+    }
+}
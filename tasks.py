@@ -8,6 +8,7 @@ from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 import io
 import os
+from utils.submission_index import submitted_ids
 
 # --- EMAIL CONFIG ---
 SMTP_SERVER = 'smtp.gmail.com'
@@ -160,12 +161,10 @@ def send_lazy_alerts_job(app):
             if d_date and d_date < now:
                 # Find students in this batch who DID NOT submit
                 batch_students = [s for s in students if s.to_dict().get('batch_id') == batch_id]
-                missing_students = []
-                
-                for bs in batch_students:
-                    sub_ref = db.collection('assignments').document(tid).collection('submissions').document(bs.id).get()
-                    if not sub_ref.exists:
-                        missing_students.append(bs.to_dict().get('full_name', 'Unknown'))
+                # Submitted set comes with the task document (see utils/submission_index.py)
+                done = submitted_ids(db, tid, t_data)
+                missing_students = [bs.to_dict().get('full_name', 'Unknown')
+                                    for bs in batch_students if bs.id not in done]
                 
                 if missing_students:
                     missed_tasks_report.append({
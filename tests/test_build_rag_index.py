@@ -0,0 +1,75 @@
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from utils.build_rag_index import (index_type_of, reindex, remove_chunks, empty_store, save_atomically, load_manifest,
+                                   resolve_index_mode, target_index_type)
+
+def make_store(index_type, count=2000):
+    texts = [f"chunk text {i}" for i in range(count)]
+    ids = [f"t{i}" for i in range(count)]
+    store = FAISS.from_texts(texts, embedding=DeterministicFakeEmbedding(size=32), ids=ids)
+    if index_type != 'flat':
+        reindex(store, index_type)
+    assert index_type_of(store.index) == index_type
+    return store
+
+def assert_survivors_found(store, removed, count=2000, step=50):
+    for i in range(0, count, step):
+        if f"t{i}" in removed: continue
+        hit = store.similarity_search(f"chunk text {i}", k=1)[0]
+        assert hit.page_content == f"chunk text {i}"
+
+def test_remove_chunks_from_ivf_keeps_surviving_chunks_aligned():
+    store = make_store('ivf')
+    removed = {f"t{i}" for i in range(400, 900)}
+
+    remove_chunks(store, sorted(removed))
+
+    assert store.index.ntotal == 1500
+    assert set(store.index_to_docstore_id.values()).isdisjoint(removed)
+    assert_survivors_found(store, removed)
+
+def test_remove_chunks_from_flat_and_hnsw():
+    for index_type in ('flat', 'hnsw'):
+        store = make_store(index_type, count=500)
+        removed = {f"t{i}" for i in range(100, 200)}
+
+        remove_chunks(store, sorted(removed))
+
+        assert store.index.ntotal == 400
+        assert_survivors_found(store, removed, count=500, step=25)
+
+def test_removing_every_chunk_leaves_a_searchable_empty_index():
+    for index_type in ('flat', 'hnsw', 'ivf'):
+        store = make_store(index_type)
+
+        remove_chunks(store, list(store.index_to_docstore_id.values()))
+
+        assert store.index.ntotal == 0
+        assert store.similarity_search("chunk text 1", k=1) == []
+
+def test_empty_store_replaces_saved_index(tmp_path):
+    embeddings = DeterministicFakeEmbedding(size=32)
+    index_dir = str(tmp_path / "faiss_index")
+    save_atomically(make_store('flat', count=50), {'files': {'a.pdf': {}}}, index_dir=index_dir)
+
+    save_atomically(empty_store(embeddings, 32), {'files': {}}, index_dir=index_dir)
+
+    reloaded = FAISS.load_local(index_dir, embeddings, allow_dangerous_deserialization=True)
+    assert reloaded.index.ntotal == 0
+    assert reloaded.similarity_search("chunk text 1", k=1) == []
+    assert load_manifest(index_dir)['files'] == {}
+
+def test_explicit_index_type_sticks_across_default_runs():
+    store = make_store('hnsw', count=9)
+
+    assert resolve_index_mode(None, {'index_mode': 'hnsw'}, store) == 'hnsw'
+    assert resolve_index_mode('auto', {'index_mode': 'hnsw'}, store) == 'auto'
+    assert resolve_index_mode('ivf', {'index_mode': 'hnsw'}, store) == 'ivf'
+    assert target_index_type('hnsw', 9) == 'hnsw'
+    assert target_index_type('auto', 9) == 'flat'
+
+def test_index_mode_of_manifests_without_one():
+    assert resolve_index_mode(None, {}, make_store('hnsw', count=9)) == 'hnsw'
+    assert resolve_index_mode(None, {}, make_store('flat', count=9)) == 'auto'
+    assert resolve_index_mode(None, None, None) == 'auto'
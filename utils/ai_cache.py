@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# Persistent cache for AI tool outputs (roadmaps, quizzes, summaries, resume analyses).
+# Entries are content-addressed: the key is a hash of the tool name and the
+# normalized prompt. Editing a prompt template therefore retires its old entries
+# automatically, and "Python " / "python" land on the same entry.
+
+# --- CONFIG ---
+CACHE_DIR = "cache"
+DB_PATH = os.path.join(CACHE_DIR, "ai_cache.sqlite3")
+MAX_BYTES = 50 * 1024 * 1024    # Total size of cached values before LRU eviction
+DAY = 24 * 60 * 60
+TOOL_TTLS = {
+    'roadmap': 30 * DAY,
+    'quiz': 7 * DAY,
+    'summary': 30 * DAY,
+    'resume_text': 30 * DAY,       # Keyed by the SHA-256 of the uploaded PDF
+    'resume_analysis': 7 * DAY,
+}
+DEFAULT_TTL = DAY
+
+# --- STATE ---
+_conn = None
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'bypassed': 0}
+
+def _db():
+    """Opens (and creates) the cache database on first use. Caller must hold _lock."""
+    global _conn
+    if _conn is None:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                tool TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )""")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries(last_used)")
+        conn.commit()
+        _conn = conn
+    return _conn
+
+def normalize(text):
+    return " ".join(str(text).split()).casefold()
+
+def make_key(tool, prompt):
+    return hashlib.sha256(f"{tool}\n{normalize(prompt)}".encode('utf-8')).hexdigest()
+
+def get(tool, prompt):
+    """Cached output for this tool + prompt, or None if missing/expired."""
+    key = make_key(tool, prompt)
+    now = time.time()
+    try:
+        with _lock:
+            db = _db()
+            row = db.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] <= now:
+                if row is not None:
+                    db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    db.commit()
+                _stats['misses'] += 1
+                return None
+            db.execute("UPDATE entries SET last_used = ? WHERE key = ?", (now, key))
+            db.commit()
+            _stats['hits'] += 1
+            return json.loads(row[0])
+    except (sqlite3.Error, ValueError) as e:
+        print(f"⚠️ AI cache read failed: {e}")
+        return None
+
+def _evict(db):
+    """Drops expired entries, then least recently used ones until under MAX_BYTES."""
+    db.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+    total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+    if total <= MAX_BYTES: return
+
+    doomed = []
+    for key, size in db.execute("SELECT key, size FROM entries ORDER BY last_used"):
+        if total <= MAX_BYTES: break
+        doomed.append((key,))
+        total -= size
+    db.executemany("DELETE FROM entries WHERE key = ?", doomed)
+    _stats['evictions'] += len(doomed)
+
+def put(tool, prompt, value):
+    """Stores a JSON-serializable tool output."""
+    payload = json.dumps(value)
+    now = time.time()
+    try:
+        with _lock:
+            db = _db()
+            db.execute(
+                "INSERT OR REPLACE INTO entries (key, tool, value, size, created_at, expires_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (make_key(tool, prompt), tool, payload, len(payload), now, now + TOOL_TTLS.get(tool, DEFAULT_TTL), now))
+            _evict(db)
+            db.commit()
+            _stats['stores'] += 1
+    except sqlite3.Error as e:
+        print(f"⚠️ AI cache write failed: {e}")
+
+def cached(tool, prompt, compute, bypass=False):
+    """
+    Returns the cached output, or compute() and caches it. None and "" results are not
+    cached, and a stored "" counts as a miss.
+    bypass=True skips the lookup (fresh answer) but still refreshes the stored entry.
+    """
+    if bypass:
+        _stats['bypassed'] += 1
+    else:
+        value = get(tool, prompt)
+        if value is not None and value != "":
+            return value
+
+    value = compute()
+    if value is not None and value != "":
+        put(tool, prompt, value)
+    return value
+
+def get_ai_cache_stats():
+    """Hit/miss counters plus entry count and size per tool."""
+    stats = dict(_stats, tools={})
+    try:
+        with _lock:
+            for tool, count, size in _db().execute("SELECT tool, COUNT(*), SUM(size) FROM entries GROUP BY tool"):
+                stats['tools'][tool] = {'entries': count, 'size_bytes': size}
+    except sqlite3.Error as e:
+        print(f"⚠️ AI cache stats unavailable: {e}")
+    return stats
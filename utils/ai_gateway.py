@@ -0,0 +1,103 @@
+import time
+import json
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Single-flight gateway for Gemini calls. When a CSA shares a topic in class, many
+# students send the identical prompt within a few seconds; only the first one goes
+# upstream and everyone else waits on its result. Results are also kept briefly so
+# stragglers arriving just after the call finished don't trigger a second one.
+#
+# Coordination runs on one asyncio loop in a background thread. Because every
+# read/write of the in-flight and result tables happens on that loop, they need no
+# locks. The blocking Gemini call itself runs on a small thread pool.
+
+# --- CONFIG ---
+RESULT_TTL = 30          # Seconds a finished result is reused for an identical prompt
+MAX_RESULTS = 256        # Finished results kept (LRU)
+UPSTREAM_WORKERS = 16    # Distinct prompts that can be in flight at once
+WAIT_TIMEOUT = 180       # Seconds a request thread waits for its (shared) result
+
+# --- STATE ---
+_loop = None
+_loop_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=UPSTREAM_WORKERS, thread_name_prefix="ai-gateway")
+_inflight = {}               # key -> asyncio.Future of the upstream call
+_results = OrderedDict()     # key -> (expires_at, result)
+_stats = {'calls': 0, 'upstream': 0, 'coalesced': 0, 'cache_hits': 0}
+
+def _get_loop():
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="ai-gateway-loop", daemon=True).start()
+                _loop = loop
+    return _loop
+
+def make_key(*parts):
+    """Stable key for a prompt: whitespace-normalized, hashed."""
+    text = json.dumps([" ".join(str(p).split()) for p in parts])
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def _cached(key):
+    entry = _results.get(key)
+    if entry is None: return None
+    if entry[0] <= time.monotonic():
+        del _results[key]
+        return None
+    _results.move_to_end(key)
+    return entry
+
+def _remember(key, result, ttl):
+    _results[key] = (time.monotonic() + ttl, result)
+    _results.move_to_end(key)
+    while len(_results) > MAX_RESULTS:
+        _results.popitem(last=False)
+
+async def _single_flight(key, fn, ttl, cache_if):
+    _stats['calls'] += 1
+    entry = _cached(key)
+    if entry:
+        _stats['cache_hits'] += 1
+        return entry[1]
+
+    shared = _inflight.get(key)
+    if shared is not None:
+        _stats['coalesced'] += 1
+        return await asyncio.shield(shared)
+
+    loop = asyncio.get_running_loop()
+    shared = loop.create_future()
+    _inflight[key] = shared
+    _stats['upstream'] += 1
+    try:
+        result = await loop.run_in_executor(_executor, fn)
+    except Exception as e:
+        shared.set_exception(e)
+        shared.exception()  # Waiters re-raise it; don't warn about it being unretrieved
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+    shared.set_result(result)
+    if ttl and cache_if(result):
+        _remember(key, result, ttl)
+    return result
+
+def coalesce(key, fn, ttl=RESULT_TTL, cache_if=lambda result: result is not None):
+    """
+    Runs fn() once per key no matter how many threads ask at the same time; every
+    caller gets the same result (or exception). Results passing cache_if are reused
+    for ttl seconds (ttl=0 coalesces concurrent calls only). Blocks the calling thread.
+    """
+    future = asyncio.run_coroutine_threadsafe(_single_flight(key, fn, ttl, cache_if), _get_loop())
+    return future.result(timeout=WAIT_TIMEOUT)
+
+def get_gateway_stats():
+    """Calls served, upstream calls made, and how many were coalesced or cached."""
+    return dict(_stats, inflight=len(_inflight), cached=len(_results))
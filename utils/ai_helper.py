@@ -1,7 +1,9 @@
-import os
-import requests
 import json
-from langchain_community.vectorstores import FAISS
+from utils.vector_store import get_vector_store, get_index_version, search
+from utils.embedding_service import init_embedding_service, embed_query
+from utils import answer_cache
+from utils.gemini_client import generate_content, stream_generate_content, extract_text
+from utils.gemini_models import get_model_name
 # Handle imports safely
 try:
     from langchain_huggingface import HuggingFaceEmbeddings
@@ -10,102 +12,116 @@ except ImportError:
 from dotenv import load_dotenv
 
 load_dotenv()
-api_key = os.getenv("GEMINI_API_KEY")
 
 # 1. Setup Local Embeddings
 local_embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+init_embedding_service(local_embeddings)
 
-def get_optimized_model_name():
-    """Finds the requested Flash model to avoid Quota/404 errors"""
+# --- HELPER: Retrieval + Prompt (shared by the plain and streaming answers) ---
+def _prepare_rag(user_question, doc_type=None):
+    """
+    Returns (reply, context). reply is a ready answer (cache hit or error message);
+    otherwise context holds what generation needs: prompt, query_vector, docs, index_version.
+    """
     try:
-        url = f"https://generativelanguage.googleapis.com/v1beta/models?key={api_key}"
-        response = requests.get(url)
-        
-        if response.status_code == 200:
-            models = response.json().get('models', [])
-            model_names = [m['name'] for m in models]
-            
-            # --- PRIORITY LIST (Updated per your request) ---
-            
-            # 1. Gemini 2.5 Flash (User Requested)
-            for m in model_names: 
-                if 'gemini-2.5-flash' in m: return m.split('/')[-1]
-
-            # 2. Gemini 1.5 Flash (Standard Fallback)
-            for m in model_names: 
-                if 'gemini-1.5-flash' in m and 'latest' not in m: return m.split('/')[-1]
-
-            # 3. Gemini 2.0 Flash (Experimental)
-            for m in model_names: 
-                if 'gemini-2.0-flash' in m: return m.split('/')[-1]
+        vector_store = get_vector_store(local_embeddings)
+        query_vector = embed_query(user_question)
+        docs = search(vector_store, query_vector, k=4, doc_type=doc_type)
+    except Exception:
+        return "⚠️ System Error: Index not found. Please run 'python utils/build_rag_index.py' first.", None
 
-            # 4. Last Resort: Any available generative model
-            for m in model_names:
-                if 'generateContent' in m.get('supportedGenerationMethods', []):
-                    return m.split('/')[-1]
+    if not docs:
+        return "I couldn't find any information about that in the provided documents.", None
 
-        # If auto-discovery fails, force the requested one
-        return "gemini-2.5-flash" 
-    except:
-        return "gemini-2.5-flash"
+    # Same question (or a near-duplicate) over the same chunks -> skip Gemini
+    index_version = get_index_version()
+    cached_answer = answer_cache.lookup(query_vector, docs, index_version)
+    if cached_answer:
+        return cached_answer, None
 
-# Initialize Model Selection
-CURRENT_MODEL = get_optimized_model_name()
-print(f"🤖 AI Chat configured to use: {CURRENT_MODEL}")
+    context_text = "\n\n".join([d.page_content for d in docs])
+    
+    final_prompt = f"""
+    You are an intelligent assistant for Saintgits College.
+    Answer based strictly on the context below.
+    
+    [CONTEXT]:
+    {context_text}
+    
+    [QUESTION]:
+    {user_question}
+    
+    [ANSWER]:
+    """
+    return None, {'prompt': final_prompt, 'query_vector': query_vector, 'docs': docs, 'index_version': index_version}
 
-def get_rag_response(user_question):
+def get_rag_response(user_question, doc_type=None):
+    """Answers from the knowledge base. doc_type (e.g. 'syllabus', 'college_info') limits retrieval to that kind of document."""
     try:
         # --- PART 1: RETRIEVAL ---
-        try:
-            vector_store = FAISS.load_local(
-                "faiss_index", 
-                local_embeddings, 
-                allow_dangerous_deserialization=True
-            )
-            docs = vector_store.similarity_search(user_question, k=4)
-        except Exception:
-            return "⚠️ System Error: Index not found. Please run 'python utils/build_rag_index.py' first."
-        
-        if not docs:
-            return "I couldn't find any information about that in the provided documents."
+        reply, ctx = _prepare_rag(user_question, doc_type)
+        if reply:
+            return reply
 
         # --- PART 2: GENERATION ---
-        context_text = "\n\n".join([d.page_content for d in docs])
-        
-        final_prompt = f"""
-        You are an intelligent assistant for Saintgits College.
-        Answer based strictly on the context below.
-        
-        [CONTEXT]:
-        {context_text}
-        
-        [QUESTION]:
-        {user_question}
-        
-        [ANSWER]:
-        """
-        
-        # API Call
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{CURRENT_MODEL}:generateContent?key={api_key}"
-        
-        headers = {'Content-Type': 'application/json'}
-        data = { "contents": [{ "parts": [{"text": final_prompt}] }] }
-        
-        response = requests.post(url, headers=headers, json=data)
+        # API Call (pooled session, timeouts and retries live in gemini_client)
+        current_model = get_model_name()
+        response = generate_content(ctx['prompt'], current_model)
         
         if response.status_code == 200:
-            return response.json()['candidates'][0]['content']['parts'][0]['text']
+            answer = extract_text(response)
+            answer_cache.store(ctx['query_vector'], ctx['docs'], ctx['index_version'], answer)
+            return answer
         elif response.status_code == 429:
              return "⚠️ Traffic Limit: The AI is busy (Quota Exceeded). Please wait a moment."
         else:
             # Fallback: If 2.5 fails, try 1.5-flash immediately
-            if CURRENT_MODEL == "gemini-2.5-flash":
-                fallback_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={api_key}"
-                response = requests.post(fallback_url, headers=headers, json=data)
+            if current_model == "gemini-2.5-flash":
+                response = generate_content(ctx['prompt'], "gemini-1.5-flash")
                 if response.status_code == 200:
-                     return response.json()['candidates'][0]['content']['parts'][0]['text']
+                     answer = extract_text(response)
+                     answer_cache.store(ctx['query_vector'], ctx['docs'], ctx['index_version'], answer)
+                     return answer
             
-            return f"Google API Error ({CURRENT_MODEL}): {response.text}"
+            return f"Google API Error ({current_model}): {response.text}"
+
+    except Exception as e:
+        return f"System Error: {str(e)}"
+
+def stream_rag_response(user_question, doc_type=None):
+    """
+    Same answer as get_rag_response, yielded piece by piece as Gemini generates it.
+    Cache hits and error messages come through as a single piece.
+    """
+    try:
+        reply, ctx = _prepare_rag(user_question, doc_type)
+        if reply:
+            yield reply
+            return
+
+        current_model = get_model_name()
+        models_to_try = [current_model]
+        if current_model == "gemini-2.5-flash":
+            models_to_try.append("gemini-1.5-flash")
+
+        for model in models_to_try:
+            pieces = []
+            try:
+                for piece in stream_generate_content(ctx['prompt'], model):
+                    pieces.append(piece)
+                    yield piece
+            except RuntimeError as e:
+                if pieces: raise  # Already sent part of an answer; don't splice in another model's
+                if "(429)" in str(e):
+                    yield "⚠️ Traffic Limit: The AI is busy (Quota Exceeded). Please wait a moment."
+                    return
+                print(f"Streaming error ({model}): {e}")
+                continue
+            if pieces:
+                answer_cache.store(ctx['query_vector'], ctx['docs'], ctx['index_version'], "".join(pieces))
+            return
+
+        yield f"Google API Error ({current_model}): streaming unavailable"
 
     except Exception as e:
-        return f"System Error: {str(e)}"
\ No newline at end of file
+        yield f"\nSystem Error: {str(e)}"
@@ -0,0 +1,86 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# --- CONFIG ---
+CACHE_TTL = 6 * 60 * 60        # Seconds an answer stays valid
+SIMILARITY_THRESHOLD = 0.92    # Cosine similarity between question vectors to count as "the same question"
+MAX_CHUNK_SETS = 500           # Distinct retrieved-chunk sets kept (LRU)
+MAX_ANSWERS_PER_SET = 8
+
+# --- STATE ---
+# chunk_set_key -> list of {'vector', 'answer', 'expires_at'}
+_entries = OrderedDict()
+_index_version = None
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'stores': 0, 'invalidations': 0}
+
+def chunk_id(doc):
+    """Docstore ID of a retrieved chunk, or a content hash for indexes built without IDs."""
+    return getattr(doc, 'id', None) or hashlib.sha1(doc.page_content.encode('utf-8')).hexdigest()
+
+def _chunk_set_key(docs):
+    return tuple(sorted(chunk_id(d) for d in docs))
+
+def _unit(vector):
+    v = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(v)
+    return v / norm if norm else v
+
+def _check_version(index_version):
+    """Drops every answer when the FAISS index has been rebuilt. Caller must hold _lock."""
+    global _index_version
+    if index_version != _index_version:
+        if _entries:
+            _stats['invalidations'] += 1
+            print("🧹 Answer cache cleared (knowledge base index changed).")
+        _entries.clear()
+        _index_version = index_version
+
+def lookup(query_vector, docs, index_version):
+    """Returns a cached answer for a near-duplicate question with the same top-k chunks, else None."""
+    key = _chunk_set_key(docs)
+    query = _unit(query_vector)
+    now = time.time()
+
+    with _lock:
+        _check_version(index_version)
+        answers = _entries.get(key)
+        if answers:
+            answers[:] = [a for a in answers if a['expires_at'] > now]
+            for entry in answers:
+                if float(np.dot(entry['vector'], query)) >= SIMILARITY_THRESHOLD:
+                    _entries.move_to_end(key)
+                    _stats['hits'] += 1
+                    return entry['answer']
+            if not answers:
+                del _entries[key]
+        _stats['misses'] += 1
+    return None
+
+def store(query_vector, docs, index_version, answer):
+    """Caches a successful answer under its question vector and retrieved chunk set."""
+    key = _chunk_set_key(docs)
+    entry = {'vector': _unit(query_vector), 'answer': answer, 'expires_at': time.time() + CACHE_TTL}
+
+    with _lock:
+        _check_version(index_version)
+        answers = _entries.setdefault(key, [])
+        answers.append(entry)
+        del answers[:-MAX_ANSWERS_PER_SET]
+        _entries.move_to_end(key)
+        while len(_entries) > MAX_CHUNK_SETS:
+            _entries.popitem(last=False)
+        _stats['stores'] += 1
+
+def get_answer_cache_stats():
+    """Hit/miss counters and current size."""
+    with _lock:
+        stats = dict(_stats)
+        stats['chunk_sets'] = len(_entries)
+        stats['answers'] = sum(len(a) for a in _entries.values())
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0
+    return stats
@@ -0,0 +1,90 @@
+import random
+from firebase_admin import firestore
+from utils.firestore_repo import GET_ALL_CHUNK, count_query
+
+# Sharded applicant counters for placement drives.
+# The drives page used to download every applicant document of every drive just to
+# len() them. Each drive now has NUM_SHARDS small counter documents under
+# placement_drives/{id}/applicant_counter_shards/. apply_drive bumps one shard at
+# random in the same transaction that writes the application, so a burst of students
+# applying to one drive doesn't contend on a single document. The drives page
+# reads the shards of the drives it shows with one batched get_all.
+# Drives created before this are shown with a count() aggregation (no writes on a
+# page view). Their counters are switched on by the first application, or in bulk by
+#   python utils/migrate_applicant_counters.py
+# Both run in a transaction that re-checks COUNTER_FLAG, so no application is lost.
+
+# --- CONFIG ---
+NUM_SHARDS = 5
+SHARD_COLLECTION = 'applicant_counter_shards'
+COUNTER_FLAG = 'has_applicant_counter'   # Set on drives whose shards are authoritative
+
+def _shard_ref(drive_ref, index):
+    return drive_ref.collection(SHARD_COLLECTION).document(str(index))
+
+def init_counter(batch, drive_ref, start=0):
+    """Adds the zeroed shards (start goes to shard 0) to a write batch or transaction. Caller sets COUNTER_FLAG on the drive."""
+    for i in range(NUM_SHARDS):
+        batch.set(_shard_ref(drive_ref, i), {'count': start if i == 0 else 0})
+
+def _count_in_transaction(transaction, drive_ref):
+    """Applicants of a drive, read inside the transaction (ids only)."""
+    return sum(1 for _ in transaction.get(drive_ref.collection('applicants').select([])))
+
+def _enable_counter(transaction, drive_ref, count):
+    """Writes the shards holding count and sets COUNTER_FLAG. The drive doc write serializes concurrent callers."""
+    init_counter(transaction, drive_ref, start=count)
+    transaction.update(drive_ref, {COUNTER_FLAG: True})
+
+@firestore.transactional
+def _apply(transaction, drive_ref, applicant_ref, applicant_data):
+    if applicant_ref.get(transaction=transaction).exists:
+        return False
+    drive = drive_ref.get(transaction=transaction)
+    if drive.exists and not (drive.to_dict() or {}).get(COUNTER_FLAG):
+        # Legacy drive: start its counter with everyone who applied so far, plus this application
+        _enable_counter(transaction, drive_ref, _count_in_transaction(transaction, drive_ref) + 1)
+    elif drive.exists:
+        transaction.set(_shard_ref(drive_ref, random.randrange(NUM_SHARDS)),
+                        {'count': firestore.Increment(1)}, merge=True)
+    transaction.set(applicant_ref, applicant_data)
+    return True
+
+def record_application(db, drive_id, student_id, applicant_data):
+    """Writes the application and counts it atomically. False if the student had already applied."""
+    drive_ref = db.collection('placement_drives').document(drive_id)
+    applicant_ref = drive_ref.collection('applicants').document(student_id)
+    return _apply(db.transaction(), drive_ref, applicant_ref, applicant_data)
+
+@firestore.transactional
+def _backfill(transaction, drive_ref):
+    drive = drive_ref.get(transaction=transaction)
+    if not drive.exists or (drive.to_dict() or {}).get(COUNTER_FLAG):
+        return None  # Gone, or switched on meanwhile by an application
+    count = _count_in_transaction(transaction, drive_ref)
+    _enable_counter(transaction, drive_ref, count)
+    return count
+
+def backfill_counter(db, drive_id):
+    """Turns on the counter of a legacy drive. Applicant count, or None if there was nothing to do."""
+    return _backfill(db.transaction(), db.collection('placement_drives').document(drive_id))
+
+def applicant_counts(db, drive_docs):
+    """{drive_id: applicant count} for the given drive snapshots, from one batched read of their shards."""
+    counts = {}
+    counted = [d for d in drive_docs if (d.to_dict() or {}).get(COUNTER_FLAG)]
+    shard_refs = [_shard_ref(d.reference, i) for d in counted for i in range(NUM_SHARDS)]
+    for chunk_start in range(0, len(shard_refs), GET_ALL_CHUNK):
+        for shard in db.get_all(shard_refs[chunk_start:chunk_start + GET_ALL_CHUNK]):
+            if not shard.exists: continue
+            drive_id = shard.reference.parent.parent.id
+            counts[drive_id] = counts.get(drive_id, 0) + int((shard.to_dict() or {}).get('count') or 0)
+
+    # Legacy drives: read-only count until the migration (or their next application) switches the counter on
+    for d in drive_docs:
+        if (d.to_dict() or {}).get(COUNTER_FLAG): continue
+        try:
+            counts[d.id] = count_query(d.reference.collection('applicants'))
+        except Exception as e:
+            print(f"⚠️ Applicant count failed for {d.id}: {e}")
+    return counts
@@ -0,0 +1,78 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import faiss
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.vector_store import INDEX_DIR
+from utils.build_rag_index import make_index, index_vectors
+
+# Recall vs latency of each index type against the exact (flat) baseline.
+# Run it on the real index, or on a synthetic corpus to see how things scale:
+#   python utils/benchmark_rag_index.py
+#   python utils/benchmark_rag_index.py --synthetic 50000
+
+def load_vectors(index_dir=INDEX_DIR):
+    index = faiss.read_index(os.path.join(index_dir, "index.faiss"))
+    return np.ascontiguousarray(index_vectors(index), dtype=np.float32)
+
+def synthetic_vectors(count, dim=384, clusters=200, seed=42):
+    """Clustered random vectors shaped like sentence embeddings (one cluster per topic)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=count)
+    vectors = centers[labels] + 0.5 * rng.normal(size=(count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def make_queries(vectors, count, seed=7):
+    """Questions land near existing chunks but not exactly on them."""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(vectors), size=min(count, len(vectors)), replace=False)
+    noise = rng.normal(scale=vectors.std() * 0.3, size=(len(rows), vectors.shape[1]))
+    return (vectors[rows] + noise).astype(np.float32)
+
+def timed_search(index, queries, k):
+    """One query at a time, like the chatbot. Returns (results, latencies_ms)."""
+    results, latencies = [], []
+    for q in queries:
+        started = time.perf_counter()
+        _, ids = index.search(q.reshape(1, -1), k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append(ids[0])
+    return results, np.array(latencies)
+
+def recall_at_k(results, truth, k):
+    return float(np.mean([len(set(r) & set(t)) / k for r, t in zip(results, truth)]))
+
+def run_benchmark(vectors, k=4, query_count=200):
+    print(f"📊 Benchmarking {len(vectors)} vectors (dim={vectors.shape[1]}), {query_count} queries, k={k}")
+    queries = make_queries(vectors, query_count)
+
+    rows = []
+    truth = None
+    for index_type in ('flat', 'hnsw', 'ivf'):
+        started = time.perf_counter()
+        index = make_index(index_type, vectors)
+        build_s = time.perf_counter() - started
+
+        results, latencies = timed_search(index, queries, k)
+        if truth is None: truth = results  # flat is exact
+        rows.append((index_type, build_s, np.percentile(latencies, 50), np.percentile(latencies, 95),
+                     recall_at_k(results, truth, k)))
+
+    print(f"{'type':<6} {'build (s)':>10} {'p50 (ms)':>10} {'p95 (ms)':>10} {'recall@' + str(k):>10}")
+    for index_type, build_s, p50, p95, recall in rows:
+        print(f"{index_type:<6} {build_s:>10.2f} {p50:>10.3f} {p95:>10.3f} {recall:>10.3f}")
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare flat / HNSW / IVF FAISS indexes on recall and latency.")
+    parser.add_argument('--synthetic', type=int, default=0, help="Benchmark N synthetic vectors instead of faiss_index")
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('-k', type=int, default=4)
+    args = parser.parse_args()
+
+    vectors = synthetic_vectors(args.synthetic) if args.synthetic else load_vectors()
+    run_benchmark(vectors, k=args.k, query_count=args.queries)
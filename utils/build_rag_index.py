@@ -1,64 +1,330 @@
 import os
 import sys
+import json
 import shutil
-from PyPDF2 import PdfReader
-from langchain_text_splitters import RecursiveCharacterTextSplitter 
-from langchain_huggingface import HuggingFaceEmbeddings # <--- Switch to Local
+import hashlib
+import argparse
+import numpy as np
+import faiss
+from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 from dotenv import load_dotenv
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.vector_store import INDEX_DIR
+from utils.pdf_extractor import iter_pdf_pages
 load_dotenv()
 
-def build_index(pdf_folder="knowledge_base"):
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+EMBED_BATCH_SIZE = 64   # Chunks embedded per forward pass
+MANIFEST_FILE = "manifest.json"
+
+# --- INDEX TYPES ---
+# flat: exact search, cost grows linearly with the number of chunks.
+# hnsw: graph-based ANN, fast and high recall, but no in-place deletes (we rebuild instead).
+# ivf:  clustered ANN with trained centroids, smallest memory for very large corpora.
+INDEX_TYPES = ('auto', 'flat', 'hnsw', 'ivf')
+FLAT_MAX_CHUNKS = 10000     # auto: exact search is fast enough below this
+HNSW_MAX_CHUNKS = 200000    # auto: HNSW up to here, IVF beyond
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+IVF_NPROBE_RATIO = 16       # nprobe = nlist / ratio ...
+IVF_MIN_NPROBE = 8          # ... but never fewer than this many clusters
+
+# Filename keyword -> document type, first match wins. Lets the chatbot search one kind of document.
+DOC_TYPE_RULES = [
+    ('syllabus', 'syllabus'),
+    ('curriculum', 'syllabus'),
+    ('saintgits', 'college_info'),
+    ('info', 'college_info'),
+    ('circular', 'circular'),
+    ('placement', 'placement')
+]
+
+# --- HELPER: Content hash of a PDF ---
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def classify_document(filename):
+    name = filename.lower()
+    for keyword, doc_type in DOC_TYPE_RULES:
+        if keyword in name: return doc_type
+    return 'general'
+
+# --- HELPER: FAISS index construction ---
+def choose_index_type(chunk_count):
+    if chunk_count < FLAT_MAX_CHUNKS: return 'flat'
+    if chunk_count < HNSW_MAX_CHUNKS: return 'hnsw'
+    return 'ivf'
+
+def index_type_of(index):
+    if isinstance(index, faiss.IndexHNSW): return 'hnsw'
+    if isinstance(index, faiss.IndexIVF): return 'ivf'
+    return 'flat'
+
+def ivf_nlist(chunk_count):
+    # ~4*sqrt(n) centroids, but keep >= 39 training points per centroid
+    return max(1, min(int(4 * np.sqrt(chunk_count)), chunk_count // 39))
+
+def resolve_index_mode(requested, manifest, vector_store):
+    """
+    'auto' or a fixed index type. An explicit --index-type sticks (saved in the manifest
+    as index_mode) until another one, including 'auto', is given.
+    """
+    if requested: return requested
+    if manifest and manifest.get('index_mode'): return manifest['index_mode']
+    if vector_store is not None:
+        # Manifests from before index_mode: auto would have picked exactly choose_index_type(ntotal)
+        existing = index_type_of(vector_store.index)
+        if existing != choose_index_type(vector_store.index.ntotal): return existing
+    return 'auto'
+
+def target_index_type(index_mode, chunk_count):
+    return choose_index_type(chunk_count) if index_mode == 'auto' else index_mode
+
+def make_index(index_type, vectors):
+    """Builds (and trains, for IVF) a FAISS index of the given type over an (n, dim) float32 array."""
+    n, dim = vectors.shape
+    if index_type == 'hnsw':
+        index = faiss.IndexHNSWFlat(dim, HNSW_M)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+    elif index_type == 'ivf':
+        nlist = ivf_nlist(n)
+        index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, nlist)
+        index.train(vectors)
+        index.nprobe = min(nlist, max(IVF_MIN_NPROBE, nlist // IVF_NPROBE_RATIO))
+    else:
+        index = faiss.IndexFlatL2(dim)
+    index.add(vectors)
+    return index
+
+def index_vectors(index):
+    """All vectors stored in an index, in position order."""
+    if isinstance(index, faiss.IndexIVF):
+        index.make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)
+
+def reindex(vector_store, index_type, drop_ids=()):
+    """
+    Rebuilds the store's FAISS index as index_type, optionally without some chunks.
+    Used to switch index types and to delete from HNSW/IVF indexes (see remove_chunks).
+    """
+    drop_ids = set(drop_ids)
+    vectors = index_vectors(vector_store.index)
+    keep = [pos for pos, doc_id in sorted(vector_store.index_to_docstore_id.items()) if doc_id not in drop_ids]
+
+    if drop_ids:
+        vector_store.docstore.delete([d for d in drop_ids if d in vector_store.docstore._dict])
+    vector_store.index_to_docstore_id = {
+        new_pos: vector_store.index_to_docstore_id[old_pos] for new_pos, old_pos in enumerate(keep)
+    }
+    if not keep: index_type = 'flat'  # IVF can't train on zero vectors
+    vector_store.index = make_index(index_type, np.ascontiguousarray(vectors[keep]))
+
+def empty_store(embeddings, dim):
+    """A store with no chunks. Saved in place of the old index when the knowledge base is empty."""
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    return FAISS(embedding_function=embeddings, index=faiss.IndexFlatL2(dim),
+                 docstore=InMemoryDocstore(), index_to_docstore_id={})
+
+def remove_chunks(vector_store, chunk_ids):
+    """
+    Deletes chunks from the store. Only a flat index is compacted the way LangChain's
+    index_to_docstore_id expects: HNSW can't remove at all, and IVF accepts remove_ids
+    but keeps the old labels, so positions would point at the wrong chunks. Both are rebuilt.
+    """
+    index_type = index_type_of(vector_store.index)
+    if index_type == 'flat':
+        vector_store.delete(chunk_ids)
+    else:
+        reindex(vector_store, index_type, drop_ids=chunk_ids)
+
+# --- HELPER: Manifest (what is already in the index) ---
+def load_manifest(index_dir=INDEX_DIR):
+    """Returns the manifest of the existing index, or None if it was built without one."""
+    path = os.path.join(index_dir, MANIFEST_FILE)
+    if not os.path.exists(path): return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def new_manifest():
+    return {
+        'format': 3,  # v3: chunks are per page and tagged with doc_type
+        'embedding_model': EMBEDDING_MODEL,
+        'chunk_size': CHUNK_SIZE,
+        'chunk_overlap': CHUNK_OVERLAP,
+        'files': {}
+    }
+
+def is_compatible(manifest):
+    """An index can only be updated in place if it was built with the same model and chunking."""
+    return bool(manifest) and all(manifest.get(k) == v for k, v in new_manifest().items() if k != 'files')
+
+# --- PIPELINE: pages -> chunks -> embedding batches ---
+def iter_chunks(page_records, file_hashes, text_splitter, indexed_files):
+    """
+    Splits each extracted page into chunks and records them in the manifest as they pass.
+    Chunks never cross a page (or document) boundary, so each one knows exactly where it came from.
+    Yields (text, metadata, chunk_id).
+    """
+    for record in page_records:
+        filename = record['source']
+        entry = indexed_files.setdefault(filename, {
+            'sha256': file_hashes[filename], 'doc_type': classify_document(filename), 'pages': 0, 'chunks': []
+        })
+        entry['pages'] = max(entry['pages'], record['page'])
+        metadata = {'source': filename, 'page': record['page'], 'doc_type': entry['doc_type']}
+
+        for i, text in enumerate(text_splitter.split_text(record['text'])):
+            chunk_id = f"{entry['sha256'][:16]}-p{record['page']:04d}-{i:03d}"
+            entry['chunks'].append({'id': chunk_id, 'page': record['page']})
+            yield text, dict(metadata), chunk_id
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# --- HELPER: Atomic save (readers never see a half-written index) ---
+def save_atomically(vector_store, manifest, index_dir=INDEX_DIR):
+    tmp_dir = f"{index_dir}.tmp"
+    old_dir = f"{index_dir}.old"
+    for d in (tmp_dir, old_dir):
+        if os.path.exists(d): shutil.rmtree(d)
+
+    vector_store.save_local(tmp_dir)
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    if os.path.exists(index_dir):
+        os.rename(index_dir, old_dir)
+    os.rename(tmp_dir, index_dir)
+    if os.path.exists(old_dir):
+        shutil.rmtree(old_dir)
+
+def build_index(pdf_folder="knowledge_base", full_rebuild=False, workers=None, index_type=None):
     print("🚀 Starting Local RAG Builder...")
-    
-    # 1. Clean up old index (Crucial: Google embeddings are incompatible with Local ones)
-    if os.path.exists("faiss_index"):
-        shutil.rmtree("faiss_index")
-        print("🗑️  Deleted old Google-based index.")
 
-    # 2. Read PDFs
+    # 1. Scan PDFs
     print("📂 Scanning 'knowledge_base'...")
-    text = ""
     if not os.path.exists(pdf_folder):
         os.makedirs(pdf_folder)
         print(f"❌ Folder '{pdf_folder}' missing. Created it.")
-        return
 
-    pdf_count = 0
-    for filename in os.listdir(pdf_folder):
+    current_files = {}
+    for filename in sorted(os.listdir(pdf_folder)):
         if filename.endswith('.pdf'):
-            try:
-                pdf_path = os.path.join(pdf_folder, filename)
-                pdf_reader = PdfReader(pdf_path)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() or ""
-                pdf_count += 1
-                print(f"   - Loaded: {filename}")
-            except Exception as e:
-                print(f"   - ⚠️ Skipped {filename}: {e}")
-
-    if not text:
+            current_files[filename] = file_sha256(os.path.join(pdf_folder, filename))
+
+    # 2. Decide what needs (re-)embedding
+    from langchain_huggingface import HuggingFaceEmbeddings # <--- Switch to Local (loaded only when building)
+    embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+    previous_manifest = load_manifest()
+    manifest = None if full_rebuild else previous_manifest
+    vector_store = None
+
+    if manifest and is_compatible(manifest) and os.path.exists(os.path.join(INDEX_DIR, "index.faiss")):
+        vector_store = FAISS.load_local(INDEX_DIR, embeddings, allow_dangerous_deserialization=True)
+        print(f"♻️  Incremental mode: existing index has {vector_store.index.ntotal} chunks.")
+    else:
+        if not full_rebuild and os.path.exists(INDEX_DIR):
+            print("⚠️  Existing index has no compatible manifest. Rebuilding from scratch.")
+        manifest = new_manifest()
+    index_mode = resolve_index_mode(index_type, previous_manifest, vector_store)
+    manifest['index_mode'] = index_mode
+
+    indexed_files = manifest['files']
+    added = [f for f in current_files if f not in indexed_files]
+    changed = [f for f in current_files if f in indexed_files and indexed_files[f]['sha256'] != current_files[f]]
+    removed = [f for f in indexed_files if f not in current_files]
+    print(f"   - New: {len(added)} | Changed: {len(changed)} | Removed: {len(removed)} | "
+          f"Unchanged: {len(current_files) - len(added) - len(changed)}")
+
+    if not (added or changed or removed) and vector_store is not None:
+        target_type = target_index_type(index_mode, vector_store.index.ntotal)
+        if index_type_of(vector_store.index) == target_type and previous_manifest.get('index_mode') == index_mode:
+            print("✅ Index is already up to date. Nothing to embed.")
+            return
+
+    # 3. Drop vectors of changed/deleted files
+    stale_ids = []
+    for filename in changed + removed:
+        stale_ids.extend(c['id'] for c in indexed_files[filename]['chunks'])
+        indexed_files.pop(filename)
+    if stale_ids and vector_store is not None:
+        remove_chunks(vector_store, stale_ids)
+        print(f"🗑️  Removed {len(stale_ids)} stale chunks.")
+
+    # 4. Stream new/changed PDFs: extract pages (process pool) -> chunk -> embed in batches
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    to_embed = added + changed
+    if to_embed:
+        print("🧠 Generating Embeddings (using local 'all-MiniLM-L6-v2')...")
+        # This runs on your CPU - no API key needed, no rate limits!
+    pages = iter_pdf_pages([os.path.join(pdf_folder, f) for f in to_embed], workers=workers)
+    chunks = iter_chunks(pages, current_files, text_splitter, indexed_files)
+
+    for batch in batched(chunks, EMBED_BATCH_SIZE):
+        texts, metadatas, ids = (list(col) for col in zip(*batch))
+        if vector_store is None:
+            vector_store = FAISS.from_texts(texts, embedding=embeddings, metadatas=metadatas, ids=ids)
+        else:
+            vector_store.add_texts(texts, metadatas=metadatas, ids=ids)
+
+    for filename in to_embed:
+        entry = indexed_files.get(filename)
+        if not entry or not entry['chunks']:
+            indexed_files.pop(filename, None)  # Retried on the next run
+            print(f"   - ⚠️ Skipped {filename}: no readable text.")
+        else:
+            print(f"   - Embedded: {filename} [{entry['doc_type']}] ({len(entry['chunks'])} chunks, {entry['pages']} pages)")
+
+    # Nothing left to search: replace the old index (and manifest) with an empty one, so
+    # deleted documents stop being retrieved. Running servers hot-swap to it too, which
+    # deleting the directory alone would not do.
+    if vector_store is None or vector_store.index.ntotal == 0:
+        if os.path.exists(INDEX_DIR):
+            dim = vector_store.index.d if vector_store is not None else len(embeddings.embed_query("dimension probe"))
+            manifest['index_type'] = 'flat'
+            save_atomically(empty_store(embeddings, dim), manifest)
+            print("🗑️  Knowledge base has no readable text. Replaced the old index with an empty one.")
         print("❌ No readable text found in PDFs.")
         return
 
-    # 3. Chunk Text
-    print("✂️  Splitting text...")
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    chunks = text_splitter.split_text(text)
-    print(f"   - Created {len(chunks)} chunks.")
-
-    # 4. Generate Embeddings (Locally)
-    print("🧠 Generating Embeddings (using local 'all-MiniLM-L6-v2')...")
-    # This runs on your CPU - no API key needed, no rate limits!
-    embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-    
-    vector_store = FAISS.from_texts(chunks, embedding=embeddings)
-    
-    # 5. Save
-    vector_store.save_local("faiss_index")
-    print("🎉 SUCCESS: Local Index created! No API quota used.")
+    # 5. Pick the index structure for the final corpus size
+    target_type = target_index_type(index_mode, vector_store.index.ntotal)
+    if index_type_of(vector_store.index) != target_type:
+        print(f"🏗️  Building '{target_type}' index over {vector_store.index.ntotal} chunks...")
+        reindex(vector_store, target_type)
+    manifest['index_type'] = target_type
+
+    # 6. Save
+    save_atomically(vector_store, manifest)
+    print(f"🎉 SUCCESS: Local Index saved with {vector_store.index.ntotal} chunks! No API quota used.")
 
 if __name__ == "__main__":
-    build_index()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build or update the local FAISS index for the RAG chatbot.")
+    parser.add_argument('--folder', default="knowledge_base", help="Folder containing the PDFs")
+    parser.add_argument('--full', action='store_true', help="Ignore the manifest and re-embed every PDF")
+    parser.add_argument('--workers', type=int, default=None, help="PDF extraction processes (default: CPU count)")
+    parser.add_argument('--index-type', choices=INDEX_TYPES, default=None,
+                        help="FAISS index structure (auto picks by number of chunks). "
+                             "Kept for later runs; default: the previous build's choice, else auto")
+    args = parser.parse_args()
+    build_index(pdf_folder=args.folder, full_rebuild=args.full, workers=args.workers, index_type=args.index_type)
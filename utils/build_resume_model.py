@@ -0,0 +1,102 @@
+import os
+import sys
+import glob
+import pickle
+import argparse
+from datetime import datetime
+from sklearn.feature_extraction.text import TfidfVectorizer
+from PyPDF2 import PdfReader
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.resume_analyzer import TFIDF_MODEL_PATH, DEFAULT_JOB_DESCRIPTION
+from utils.resume_extractor import RESUME_TEXT_FIELD
+
+# Fits the resume scorer's TF-IDF vocabulary/IDF on a real corpus instead of on
+# [one resume, one JD] per request. Re-run it now and then as resumes and drives pile up:
+#   python utils/build_resume_model.py
+#   python utils/build_resume_model.py --folder sample_resumes --no-firestore
+# Resumes come from the text the Resume Analyzer saves on each student's profile.
+# Below MIN_DOCUMENTS the IDF would be fitted mostly on job descriptions, so every
+# resume term outside their vocabulary is dropped and any resume sharing a few JD
+# words looks like a strong match. No model is written then; scoring keeps the
+# per-request two-document fit until the corpus is big enough.
+
+# --- CONFIG ---
+MIN_DOCUMENTS = 50
+
+def firestore_corpus():
+    """Resume texts of students and descriptions of placement drives."""
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
+    if not firebase_admin._apps:
+        cred = credentials.Certificate("firebase-key.json")
+        firebase_admin.initialize_app(cred)
+    db = firestore.client()
+
+    texts = []
+    for doc in db.collection('users').where('role', '==', 'student').select([RESUME_TEXT_FIELD]).stream():
+        text = (doc.to_dict() or {}).get(RESUME_TEXT_FIELD)
+        if text: texts.append(text)
+    resumes = len(texts)
+
+    for doc in db.collection('placement_drives').select(['role_title', 'description']).stream():
+        d = doc.to_dict() or {}
+        text = f"{d.get('role_title') or ''}\n{d.get('description') or ''}".strip()
+        if text: texts.append(text)
+    print(f"   - Firestore: {resumes} resumes, {len(texts) - resumes} job descriptions")
+    return texts
+
+def folder_corpus(folder):
+    """Extra .txt / .pdf resumes or job descriptions from a local folder."""
+    texts = []
+    for path in sorted(glob.glob(os.path.join(folder, "*.txt"))):
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            texts.append(f.read())
+    for path in sorted(glob.glob(os.path.join(folder, "*.pdf"))):
+        try:
+            texts.append("\n".join(page.extract_text() or "" for page in PdfReader(path).pages))
+        except Exception as e:
+            print(f"   - ⚠️ Skipped {os.path.basename(path)}: {e}")
+    print(f"   - {folder}: {len(texts)} documents")
+    return texts
+
+def build_model(texts, output_path=TFIDF_MODEL_PATH, min_documents=MIN_DOCUMENTS):
+    """Fits and saves the model. Returns False (writing nothing) if the corpus is too small."""
+    texts = [t for t in texts if t and t.strip()] + [DEFAULT_JOB_DESCRIPTION]
+    if len(texts) < min_documents:
+        print(f"❌ Only {len(texts)} documents (need {min_documents}). Model not written; "
+              f"scoring keeps the two-document fallback.")
+        return False
+
+    vectorizer = TfidfVectorizer(stop_words='english')
+    vectorizer.fit(texts)
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({
+            'vectorizer': vectorizer,
+            'documents': len(texts),
+            'built_at': datetime.now().isoformat(timespec='seconds')
+        }, f)
+    os.replace(tmp_path, output_path)  # Running servers pick the new file up on their next score
+    print(f"✅ Saved {output_path}: {len(texts)} documents, {len(vectorizer.vocabulary_)} terms")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit the resume scorer's TF-IDF model on resumes and job descriptions.")
+    parser.add_argument('--folder', help="Folder of extra .txt/.pdf resumes or job descriptions")
+    parser.add_argument('--no-firestore', action='store_true', help="Don't read resumes/drives from Firestore")
+    parser.add_argument('--min-documents', type=int, default=MIN_DOCUMENTS,
+                        help="Refuse to write a model fitted on fewer documents")
+    args = parser.parse_args()
+
+    print("📐 Collecting corpus...")
+    corpus = []
+    if not args.no_firestore:
+        corpus += firestore_corpus()
+    if args.folder:
+        corpus += folder_corpus(args.folder)
+    if not build_model(corpus, min_documents=args.min_documents):
+        sys.exit(1)
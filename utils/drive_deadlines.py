@@ -0,0 +1,71 @@
+from datetime import datetime, timezone, date
+from utils.firestore_repo import count_query
+
+# Canonical deadline for placement drives.
+# Drive deadlines used to be saved as 'YYYY-MM-DD' strings in some places and as
+# timestamps in others, so "active" had to be decided in Python after streaming the
+# whole collection. Every write now stores `deadline` as midnight UTC of the deadline
+# day (a Firestore timestamp) or None, which lets active drives be one range query
+# and leaves old drives in the database without ever reading them again.
+# Drives saved before this: python utils/migrate_drive_deadlines.py
+
+DATE_FORMAT = '%Y-%m-%d'
+
+def normalize_deadline(value):
+    """Midnight UTC of the deadline day for a 'YYYY-MM-DD' string, date or datetime; None if empty/unparseable."""
+    if not value: return None
+    if isinstance(value, datetime):
+        day = value.astimezone(timezone.utc).date() if value.tzinfo else value.date()
+    elif isinstance(value, date):
+        day = value
+    else:
+        try:
+            day = datetime.strptime(str(value).strip()[:10], DATE_FORMAT).date()
+        except ValueError:
+            return None
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+def format_deadline(value, default='Open'):
+    """'YYYY-MM-DD' for display, whatever shape the stored deadline has."""
+    if not value: return default
+    if hasattr(value, 'strftime'): return value.strftime(DATE_FORMAT)
+    return str(value)
+
+def today_start():
+    """Midnight UTC of today's (local) date: a drive is open through its whole deadline day."""
+    return normalize_deadline(datetime.now().date())
+
+def active_drive_docs(db):
+    """
+    Snapshots of drives that are open today: deadline >= today, plus drives with no
+    deadline at all. Drives closed by hand (status other than 'active') are skipped.
+    Uses single-field indexes only, so no composite index has to be deployed.
+    """
+    drives = db.collection('placement_drives')
+    docs = list(drives.where('deadline', '>=', today_start()).stream())
+    try:
+        docs += list(drives.where('deadline', '==', None).stream())
+    except Exception as e:
+        print(f"⚠️ Open-ended drive query failed: {e}")
+    return [d for d in docs if (d.to_dict() or {}).get('status', 'active') == 'active']
+
+def count_active_drives(db):
+    """
+    Number of drives active_drive_docs() would return, from count() aggregations.
+    Counted live rather than kept as a counter: drives expire without any write.
+    Like active_drive_docs, single-field indexes only: open drives are counted by
+    deadline, then the few closed by hand (the app itself only writes 'active') are
+    read and taken back out.
+    """
+    drives = db.collection('placement_drives')
+    start = today_start()
+    try:
+        open_count = count_query(drives.where('deadline', '>=', start)) + count_query(drives.where('deadline', '==', None))
+        for doc in drives.where('status', '!=', 'active').select(['deadline']).stream():
+            deadline = (doc.to_dict() or {}).get('deadline')
+            if deadline is None or (hasattr(deadline, 'tzinfo') and deadline >= start):
+                open_count -= 1
+        return open_count
+    except Exception as e:
+        print(f"⚠️ Active drive count query failed, counting documents: {e}")
+        return len(active_drive_docs(db))
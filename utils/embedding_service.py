@@ -0,0 +1,117 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# --- CONFIG ---
+BATCH_WINDOW = 0.01   # Seconds to wait for more questions before running the encoder
+MAX_BATCH_SIZE = 32
+CACHE_SIZE = 2048     # Normalized questions kept in the LRU cache
+
+# --- STATE ---
+_encoder = None
+_worker = None
+_pending = []  # (normalized_text, Future) waiting for the next batch
+_pending_cond = threading.Condition()
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'batches': 0, 'encoded': 0}
+
+def normalize_question(text):
+    """Lowercases and collapses whitespace so trivially different questions share a vector."""
+    text = re.sub(r'\s+', ' ', text or '').strip().lower()
+    return text.rstrip('?!. ')
+
+def init_embedding_service(embeddings):
+    """Registers the encoder (a LangChain Embeddings object) and starts the batching thread."""
+    global _encoder, _worker
+    _encoder = embeddings
+    with _pending_cond:
+        if _worker is None:
+            _worker = threading.Thread(target=_batch_loop, name="embedding-batcher", daemon=True)
+            _worker.start()
+
+def _cache_get(key):
+    with _cache_lock:
+        vector = _cache.get(key)
+        if vector is not None:
+            _cache.move_to_end(key)
+            _stats['hits'] += 1
+        return vector
+
+def _cache_put(key, vector):
+    with _cache_lock:
+        _cache[key] = vector
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+def embed_query(text):
+    """
+    Returns the embedding for a user question.
+    Cached questions skip the encoder; the rest are encoded together with
+    any other questions that arrive within BATCH_WINDOW.
+    """
+    if _encoder is None:
+        raise RuntimeError("Embedding service not initialised. Call init_embedding_service() first.")
+
+    key = normalize_question(text)
+    vector = _cache_get(key)
+    if vector is not None:
+        return vector
+
+    future = Future()
+    with _pending_cond:
+        _stats['misses'] += 1
+        _pending.append((key, future))
+        _pending_cond.notify()
+    return future.result()
+
+def _batch_loop():
+    while True:
+        with _pending_cond:
+            while not _pending:
+                _pending_cond.wait()
+
+            # Give concurrent requests a moment to join this batch
+            deadline = time.monotonic() + BATCH_WINDOW
+            while len(_pending) < MAX_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0: break
+                _pending_cond.wait(remaining)
+
+            batch = _pending[:MAX_BATCH_SIZE]
+            del _pending[:MAX_BATCH_SIZE]
+
+        _encode_batch(batch)
+
+def _encode_batch(batch):
+    # Identical questions in the same window are encoded once
+    waiters = OrderedDict()
+    for key, future in batch:
+        waiters.setdefault(key, []).append(future)
+
+    texts = list(waiters.keys())
+    try:
+        vectors = _encoder.embed_documents(texts)
+    except Exception as e:
+        for futures in waiters.values():
+            for future in futures:
+                future.set_exception(e)
+        return
+
+    _stats['batches'] += 1
+    _stats['encoded'] += len(texts)
+    for key, vector in zip(texts, vectors):
+        _cache_put(key, vector)
+        for future in waiters[key]:
+            future.set_result(vector)
+
+def get_embedding_stats():
+    """Cache hit/miss counts and average batch size."""
+    stats = dict(_stats)
+    stats['cached_questions'] = len(_cache)
+    stats['avg_batch_size'] = round(stats['encoded'] / stats['batches'], 2) if stats['batches'] else 0
+    return stats
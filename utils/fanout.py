@@ -0,0 +1,51 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+
+# Shared thread pool for independent Firestore reads made while serving one page.
+# A dashboard that needs the user profile, the batch's tasks and the active drives
+# issues them at the same time, so the page waits for the slowest read instead of
+# the sum of all of them. The gRPC client releases the GIL while waiting, so
+# threads are enough here.
+# Sizing: a page fans out 2-3 reads, so the pool holds FANOUT_WORKERS reads for
+# roughly FANOUT_WORKERS / 3 concurrent requests. Reads never queue behind other
+# requests: when every slot is busy, submit() runs the read on the caller's own
+# thread instead. Under load a page falls back to sequential reads (the old
+# behaviour), never to waiting on someone else's.
+
+# --- CONFIG ---
+FANOUT_WORKERS = int(os.getenv("FANOUT_WORKERS", "32"))   # Reads in flight at once across all requests
+
+# --- STATE ---
+_executor = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix="fanout")
+_slots = threading.BoundedSemaphore(FANOUT_WORKERS)
+
+def _run_in_slot(fn, args):
+    try:
+        return fn(*args)
+    finally:
+        _slots.release()
+
+def submit(fn, *args):
+    """Starts fn(*args) on the pool and returns its Future; runs it inline if the pool is full."""
+    if _slots.acquire(blocking=False):
+        try:
+            return _executor.submit(_run_in_slot, fn, args)
+        except Exception:
+            _slots.release()
+            raise
+
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+def result_or(future, default, label="read"):
+    """The future's result, or default (with a log line) if it raised."""
+    try:
+        return future.result()
+    except Exception as e:
+        print(f"⚠️ Parallel {label} failed: {e}")
+        return default
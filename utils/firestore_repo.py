@@ -0,0 +1,55 @@
+# Bulk Firestore reads for the blueprints.
+# Looking users up one document().get() at a time inside a loop costs one round trip
+# per row (N+1). These helpers resolve hundreds of IDs in a handful of RPCs:
+# batched get_all for known document IDs, and chunked 'in' queries for field matches.
+
+# --- CONFIG ---
+GET_ALL_CHUNK = 100     # Document references per get_all call
+IN_QUERY_LIMIT = 30     # Firestore's maximum number of values in an 'in' filter
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def get_docs_by_ids(db, collection, ids, field_paths=None):
+    """
+    {doc_id: data} for every ID that exists in the collection (missing ones are left out).
+    field_paths limits the fields fetched, e.g. ['full_name', 'email'].
+    """
+    unique_ids = list(dict.fromkeys(i for i in ids if i))
+    docs = {}
+    for chunk in _chunks(unique_ids, GET_ALL_CHUNK):
+        refs = [db.collection(collection).document(doc_id) for doc_id in chunk]
+        for snap in db.get_all(refs, field_paths=field_paths):
+            if snap.exists:
+                docs[snap.id] = snap.to_dict() or {}
+    return docs
+
+def count_query(query):
+    """Number of documents matching the query, via a server-side count() aggregation."""
+    try:
+        return int(query.count().get()[0][0].value)
+    except Exception as e:
+        # Older client without aggregation support: ids-only scan
+        print(f"⚠️ count() aggregation unavailable, scanning ids: {e}")
+        return sum(1 for _ in query.select([]).stream())
+
+def query_in(query, field, values):
+    """
+    Streams query.where(field, 'in', values) for any number of values by running
+    one query per chunk of IN_QUERY_LIMIT. Snapshots come back chunk by chunk, so
+    any ordering across the whole result has to be applied by the caller.
+    """
+    unique_values = list(dict.fromkeys(v for v in values if v))
+    for chunk in _chunks(unique_values, IN_QUERY_LIMIT):
+        yield from query.where(field, 'in', chunk).stream()
+
+def existing_paths(db, refs):
+    """Set of document paths (ref.path) that exist, checked with batched get_all instead of one get() per ref."""
+    refs = list(refs)
+    found = set()
+    for chunk in _chunks(refs, GET_ALL_CHUNK):
+        for snap in db.get_all(chunk, field_paths=[]):
+            if snap.exists:
+                found.add(snap.reference.path)
+    return found
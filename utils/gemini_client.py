@@ -0,0 +1,136 @@
+import os
+import json
+import time
+import random
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+from utils import gemini_quota
+
+load_dotenv()
+API_KEY = os.getenv("GEMINI_API_KEY")
+BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+
+# --- CONFIG ---
+CONNECT_TIMEOUT = 5           # Seconds to establish the TCP+TLS connection
+READ_TIMEOUT = 60             # Seconds to wait for Gemini to finish answering
+MAX_CONCURRENT_REQUESTS = 8   # Upstream calls in flight across all request threads
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5            # Seconds; doubles every attempt
+BACKOFF_MAX = 8               # Never sleep longer than this between attempts
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# --- SHARED SESSION ---
+# One keep-alive connection pool for every AI feature, so each call reuses an
+# open TLS connection instead of doing a fresh handshake.
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=MAX_CONCURRENT_REQUESTS))
+_session.headers.update({'Content-Type': 'application/json'})
+_slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+
+def _retry_after_seconds(response):
+    value = response.headers.get('Retry-After')
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+def _backoff_delay(attempt, retry_after=None):
+    """Exponential backoff with full jitter, stretched to honour Retry-After."""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+    if retry_after:
+        delay = max(delay, retry_after)
+    return delay
+
+def _request(method, url, max_retries=MAX_RETRIES, on_retry=None, **kwargs):
+    """
+    Sends a request through the pooled session with bounded concurrency.
+    Retries connection errors, timeouts, 429 and 5xx with jittered backoff.
+    on_retry(response) sees every error response that is retried (the caller gets the last one).
+    Returns the last response; raises requests.RequestException if the network never answered.
+    """
+    kwargs.setdefault('timeout', (CONNECT_TIMEOUT, READ_TIMEOUT))
+    params = dict(kwargs.pop('params', None) or {}, key=API_KEY)
+
+    for attempt in range(max_retries + 1):
+        try:
+            with _slots:
+                response = _session.request(method, url, params=params, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == max_retries: raise
+            delay = _backoff_delay(attempt)
+            print(f"⏳ Gemini connection problem ({type(e).__name__}), retrying in {delay:.1f}s...")
+            time.sleep(delay)
+            continue
+
+        if response.status_code not in RETRY_STATUS or attempt == max_retries:
+            return response
+        if on_retry: on_retry(response)
+        response.close()  # Streamed bodies hold their connection until closed
+
+        retry_after = _retry_after_seconds(response)
+        if retry_after and retry_after > BACKOFF_MAX:
+            return response  # Quota window is long; let the caller fall back instead of waiting
+
+        delay = _backoff_delay(attempt, retry_after)
+        print(f"⏳ Gemini returned {response.status_code}, retrying in {delay:.1f}s...")
+        time.sleep(delay)
+
+def generate_content(prompt, model, max_retries=MAX_RETRIES):
+    """Calls models/{model}:generateContent with a single text prompt. Returns the requests.Response."""
+    url = f"{BASE_URL}/models/{model}:generateContent"
+    data = {"contents": [{"parts": [{"text": prompt}]}]}
+    tokens = gemini_quota.estimate_tokens(prompt)
+    gemini_quota.consume(model, tokens)
+    response = _request("POST", url, json=data, max_retries=max_retries,
+                        on_retry=lambda r: gemini_quota.record_response(model, r))
+    gemini_quota.record_response(model, response, tokens)
+    return response
+
+def stream_generate_content(prompt, model, max_retries=MAX_RETRIES):
+    """
+    Streams models/{model}:streamGenerateContent as Server-Sent Events and yields
+    text pieces as Gemini produces them. Only opening the stream is retried; raises
+    RuntimeError("Gemini API Error (<status>): ...") if it can't be opened.
+    """
+    url = f"{BASE_URL}/models/{model}:streamGenerateContent"
+    data = {"contents": [{"parts": [{"text": prompt}]}]}
+    gemini_quota.consume(model, gemini_quota.estimate_tokens(prompt))
+    response = _request("POST", url, json=data, params={'alt': 'sse'}, stream=True, max_retries=max_retries,
+                        on_retry=lambda r: gemini_quota.record_response(model, r))
+    if response.status_code != 200:
+        body = response.text
+        gemini_quota.record_response(model, response)
+        response.close()
+        raise RuntimeError(f"Gemini API Error ({response.status_code}): {body[:500]}")
+
+    # An open stream counts against the concurrency limit until it is drained
+    response.encoding = 'utf-8'  # text/event-stream has no charset; requests would assume latin-1
+    with _slots:
+        try:
+            # chunk_size=None hands over each chunk as it arrives instead of waiting for 512 bytes
+            for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                if not line or not line.startswith('data:'): continue
+                chunk = json.loads(line[5:])
+                for candidate in chunk.get('candidates', [])[:1]:
+                    for part in candidate.get('content', {}).get('parts', []):
+                        if part.get('text'):
+                            yield part['text']
+        finally:
+            response.close()
+
+def extract_text(response):
+    """Text of the first candidate in a successful generateContent response."""
+    return response.json()['candidates'][0]['content']['parts'][0]['text']
+
+def list_models(max_retries=1):
+    """Returns the raw model list from the API (empty list on failure)."""
+    try:
+        response = _request("GET", f"{BASE_URL}/models", max_retries=max_retries, timeout=(CONNECT_TIMEOUT, 10))
+        if response.status_code == 200:
+            return response.json().get('models', [])
+        print(f"Gemini model list error ({response.status_code}): {response.text[:200]}")
+    except requests.RequestException as e:
+        print(f"Gemini model list unavailable: {e}")
+    return []
@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import threading
+from utils.gemini_client import list_models
+
+# --- CONFIG ---
+CACHE_DIR = "cache"
+CACHE_PATH = os.path.join(CACHE_DIR, "gemini_models.json")
+CACHE_TTL = 24 * 60 * 60           # Re-discover once a day
+DEFAULT_MODEL = "gemini-2.5-flash"  # Used until the first discovery finishes
+RETRY_BASE = 30                    # Seconds to wait after the first failed discovery
+RETRY_MAX = 60 * 60                # Backoff doubles per failure, capped at an hour
+
+# --- STATE ---
+_state = {'model': None, 'fetched_at': 0.0, 'loaded_from_disk': False,
+          'failures': 0, 'retry_at': 0.0, 'refreshing': False}
+_lock = threading.Lock()
+
+def pick_model(models):
+    """Priority: 2.5 Flash, then 1.5 Flash, then 2.0 Flash, then any model that can generateContent."""
+    names = [m['name'] for m in models]
+
+    for n in names:
+        if 'gemini-2.5-flash' in n: return n.split('/')[-1]
+    for n in names:
+        if 'gemini-1.5-flash' in n and 'latest' not in n: return n.split('/')[-1]
+    for n in names:
+        if 'gemini-2.0-flash' in n: return n.split('/')[-1]
+    for m in models:
+        if 'generateContent' in m.get('supportedGenerationMethods', []):
+            return m['name'].split('/')[-1]
+    return DEFAULT_MODEL
+
+def _read_cache():
+    try:
+        with open(CACHE_PATH, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data.get('model'), float(data.get('fetched_at', 0))
+    except (OSError, ValueError):
+        return None, 0.0
+
+def _write_cache(model, fetched_at):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{CACHE_PATH}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'model': model, 'fetched_at': fetched_at}, f)
+        os.replace(tmp_path, CACHE_PATH)
+    except OSError as e:
+        print(f"⚠️ Could not save model cache: {e}")
+
+def _record_failure():
+    with _lock:
+        _state['failures'] += 1
+        delay = min(RETRY_MAX, RETRY_BASE * 2 ** (_state['failures'] - 1))
+        _state['retry_at'] = time.time() + delay
+    print(f"⚠️ Gemini model discovery failed; retrying in {delay}s")
+
+def refresh_model():
+    """Asks the API for the model list and updates memory + disk. Blocking; normally run in the background."""
+    try:
+        models = list_models()
+        if not models:
+            _record_failure()
+            return
+        model = pick_model(models)
+        fetched_at = time.time()
+        with _lock:
+            changed = model != _state['model']
+            _state['model'] = model
+            _state['fetched_at'] = fetched_at
+            _state['failures'] = 0
+            _state['retry_at'] = 0.0
+        _write_cache(model, fetched_at)
+        if changed:
+            print(f"🤖 Gemini model discovery: using {model}")
+    except Exception as e:
+        print(f"⚠️ Gemini model discovery error: {e}")
+        _record_failure()
+    finally:
+        with _lock:
+            _state['refreshing'] = False
+
+def _refresh_in_background():
+    # Single flight: only one discovery runs at a time, and none during backoff
+    with _lock:
+        if _state['refreshing'] or time.time() < _state['retry_at']: return
+        _state['refreshing'] = True
+    threading.Thread(target=refresh_model, name="gemini-model-discovery", daemon=True).start()
+
+def get_model_name():
+    """
+    Best available Gemini model for the chatbot and interview tools.
+    Never waits on the network: serves the cached choice (or DEFAULT_MODEL on a
+    cold start) and refreshes in the background once the cache is older than CACHE_TTL.
+    Failed discoveries back off exponentially (RETRY_BASE up to RETRY_MAX).
+    """
+    if not _state['loaded_from_disk']:
+        with _lock:
+            if not _state['loaded_from_disk']:
+                model, fetched_at = _read_cache()
+                if model:
+                    _state['model'] = model
+                    _state['fetched_at'] = fetched_at
+                _state['loaded_from_disk'] = True
+
+    if time.time() - _state['fetched_at'] > CACHE_TTL:
+        _refresh_in_background()
+    return _state['model'] or DEFAULT_MODEL
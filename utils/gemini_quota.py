@@ -0,0 +1,185 @@
+import os
+import re
+import json
+import time
+import threading
+from dotenv import load_dotenv
+
+# Per-model request/token budgets for Gemini, shared by every feature in the process.
+# Each model has two token buckets (requests per minute and tokens per minute) that
+# refill continuously. gemini_client charges every call and reports every response
+# here. A 429 puts the model on cooldown for as long as Google asks and lowers its
+# learned RPM, so callers can go straight to a model that still has budget instead
+# of paying for a failed round trip first.
+# The local buckets are only an estimate: when every model looks exhausted, one
+# attempt is still made. Only real 429s (including ones retried by gemini_client)
+# put a model on cooldown.
+#
+# Limits default to the free tier. Paid projects override them in .env, e.g.
+#   GEMINI_MODEL_LIMITS={"gemini-2.5-flash": {"rpm": 1000, "tpm": 1000000}}
+#   GEMINI_DEFAULT_RPM=1000   GEMINI_DEFAULT_TPM=1000000   (models not listed)
+
+load_dotenv()
+
+# --- CONFIG ---
+FREE_TIER_LIMITS = {
+    'gemini-2.5-flash': {'rpm': 10, 'tpm': 250000},
+    'gemini-2.0-flash': {'rpm': 15, 'tpm': 1000000},
+    'gemini-1.5-flash': {'rpm': 15, 'tpm': 1000000},
+    'gemini-1.5-pro': {'rpm': 2, 'tpm': 32000},
+}
+
+def _load_limits():
+    """(MODEL_LIMITS, DEFAULT_LIMITS): free-tier defaults overridden from the environment."""
+    limits = {model: dict(values) for model, values in FREE_TIER_LIMITS.items()}
+    try:
+        for model, values in json.loads(os.getenv('GEMINI_MODEL_LIMITS') or '{}').items():
+            limits.setdefault(model, {}).update({k: float(values[k]) for k in ('rpm', 'tpm') if k in values})
+    except (ValueError, TypeError, AttributeError) as e:
+        print(f"⚠️ Ignoring invalid GEMINI_MODEL_LIMITS: {e}")
+    default = {'rpm': 10, 'tpm': 250000}
+    for key in ('rpm', 'tpm'):
+        try:
+            default[key] = float(os.getenv(f'GEMINI_DEFAULT_{key.upper()}') or default[key])
+        except ValueError:
+            print(f"⚠️ Ignoring invalid GEMINI_DEFAULT_{key.upper()}")
+    for values in limits.values():
+        for key in ('rpm', 'tpm'):
+            values.setdefault(key, default[key])
+    return limits, default
+
+MODEL_LIMITS, DEFAULT_LIMITS = _load_limits()
+OUTPUT_TOKEN_ESTIMATE = 800     # Tokens a typical answer adds on top of the prompt
+DEFAULT_COOLDOWN = 30           # Seconds to avoid a model after a 429 without a retry hint
+RPM_BACKOFF = 0.75              # Learned RPM is multiplied by this on every 429...
+RPM_RECOVERY = 0.1              # ...and regains this much per successful call
+
+# --- STATE ---
+_lock = threading.Lock()
+_models = {}
+
+def estimate_tokens(prompt):
+    """Rough token count (~4 characters per token) plus the expected answer."""
+    return len(prompt) // 4 + OUTPUT_TOKEN_ESTIMATE
+
+def _state(model):
+    """Bucket state for a model, created full. Caller must hold _lock."""
+    state = _models.get(model)
+    if state is None:
+        limits = MODEL_LIMITS.get(model, DEFAULT_LIMITS)
+        state = {
+            'rpm': float(limits['rpm']),
+            'tpm': float(limits['tpm']),
+            'requests': float(limits['rpm']),
+            'tokens': float(limits['tpm']),
+            'updated': time.monotonic(),
+            'cooldown_until': 0.0,
+            'calls': 0,
+            'throttled': 0
+        }
+        _models[model] = state
+    return state
+
+def _refill(state, now):
+    elapsed = now - state['updated']
+    state['requests'] = min(state['rpm'], state['requests'] + elapsed * state['rpm'] / 60)
+    state['tokens'] = min(state['tpm'], state['tokens'] + elapsed * state['tpm'] / 60)
+    state['updated'] = now
+
+def has_budget(model, tokens=OUTPUT_TOKEN_ESTIMATE):
+    now = time.monotonic()
+    with _lock:
+        state = _state(model)
+        _refill(state, now)
+        return now >= state['cooldown_until'] and state['requests'] >= 1 and state['tokens'] >= tokens
+
+def is_cooling_down(model):
+    """True while a real 429 told us to stay away from the model."""
+    with _lock:
+        return time.monotonic() < _state(model)['cooldown_until']
+
+def available_models(models, prompt=""):
+    """
+    The models (priority order kept) that have budget left for this prompt right now.
+    If the local estimate says they are all exhausted, the first one not cooling down
+    after a real 429 is still returned: the estimate may be wrong, Google decides.
+    """
+    tokens = estimate_tokens(prompt)
+    budgeted = [model for model in models if has_budget(model, tokens)]
+    if budgeted: return budgeted
+    return [model for model in models if not is_cooling_down(model)][:1]
+
+def consume(model, tokens):
+    """Charges one request and an estimated token count. Called by gemini_client before each call."""
+    with _lock:
+        state = _state(model)
+        _refill(state, time.monotonic())
+        state['requests'] -= 1
+        state['tokens'] -= tokens
+        state['calls'] += 1
+
+def _retry_delay(response):
+    """Seconds from a Retry-After header or the RetryInfo detail in a 429 body."""
+    value = response.headers.get('Retry-After')
+    try:
+        if value: return float(value)
+    except ValueError:
+        pass
+    try:
+        for detail in response.json().get('error', {}).get('details', []):
+            match = re.match(r'([\d.]+)s$', str(detail.get('retryDelay', '')))
+            if match: return float(match.group(1))
+    except ValueError:
+        pass
+    return None
+
+def record_response(model, response, estimated_tokens=0):
+    """
+    Learns from an upstream answer: 429 -> cooldown + lower RPM; 200 -> settle actual token use.
+    gemini_client also calls this for 429s it retries, not just for the final response.
+    """
+    if response.status_code == 429:
+        delay = _retry_delay(response) or DEFAULT_COOLDOWN
+        with _lock:
+            state = _state(model)
+            state['cooldown_until'] = max(state['cooldown_until'], time.monotonic() + delay)
+            state['rpm'] = max(1.0, state['rpm'] * RPM_BACKOFF)
+            state['requests'] = 0.0
+            state['throttled'] += 1
+        print(f"🚦 {model} rate limited; avoiding it for {delay:.0f}s")
+        return
+
+    if response.status_code != 200: return
+    actual = None
+    if estimated_tokens:
+        try:
+            actual = response.json().get('usageMetadata', {}).get('totalTokenCount')
+        except ValueError:
+            pass
+    with _lock:
+        state = _state(model)
+        limit = MODEL_LIMITS.get(model, DEFAULT_LIMITS)['rpm']
+        state['rpm'] = min(float(limit), state['rpm'] + RPM_RECOVERY)
+        if actual:
+            state['tokens'] -= actual - estimated_tokens
+
+def get_quota_state():
+    """Remaining budget per model, for the admin endpoint."""
+    now = time.monotonic()
+    report = {}
+    with _lock:
+        for model in sorted(set(MODEL_LIMITS) | set(_models)):
+            state = _state(model)
+            _refill(state, now)
+            limits = MODEL_LIMITS.get(model, DEFAULT_LIMITS)
+            report[model] = {
+                'rpm_limit': limits['rpm'],
+                'rpm_learned': round(state['rpm'], 2),
+                'requests_left': max(0, int(state['requests'])),
+                'tpm_limit': limits['tpm'],
+                'tokens_left': max(0, int(state['tokens'])),
+                'cooldown_seconds': max(0, round(state['cooldown_until'] - now)),
+                'calls': state['calls'],
+                'throttled': state['throttled']
+            }
+    return report
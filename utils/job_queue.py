@@ -0,0 +1,74 @@
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Background jobs for the slow AI tools (roadmap, quiz, summarizer, resume analysis).
+# The request thread only enqueues and returns a job ID; a small worker pool does the
+# Gemini/ML work and the page polls /student/api/jobs/<job_id> for the result.
+# That keeps Flask's request threads free for dashboards while Gemini is slow.
+
+# --- CONFIG ---
+JOB_WORKERS = 4      # AI jobs running at once
+MAX_PENDING = 64     # Queued + running jobs before new ones are refused
+JOB_TTL = 10 * 60    # Seconds a finished job's result stays available
+
+# --- STATE ---
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="ai-job")
+_jobs = {}
+_lock = threading.Lock()
+
+def _prune(now):
+    """Forgets finished jobs older than JOB_TTL. Caller must hold _lock."""
+    expired = [job_id for job_id, job in _jobs.items()
+               if job['finished_at'] and now - job['finished_at'] > JOB_TTL]
+    for job_id in expired:
+        del _jobs[job_id]
+
+def _run(job_id, fn, args):
+    job = _jobs[job_id]
+    job['status'] = 'running'
+    try:
+        payload, http_status = fn(*args)
+    except Exception as e:
+        print(f"❌ AI job {job['kind']} failed: {e}")
+        payload, http_status = {"error": "Something went wrong. Please try again."}, 500
+    job.update(status='done', result=payload, http_status=http_status, finished_at=time.time())
+
+def submit(kind, owner, fn, *args):
+    """
+    Queues fn(*args), which must return (json_payload, http_status) and must not touch
+    the Flask request. Returns the job ID, or None when the queue is full.
+    """
+    now = time.time()
+    with _lock:
+        _prune(now)
+        pending = sum(1 for job in _jobs.values() if job['status'] != 'done')
+        if pending >= MAX_PENDING:
+            return None
+        job_id = uuid.uuid4().hex
+        _jobs[job_id] = {
+            'job_id': job_id,
+            'kind': kind,
+            'owner': owner,
+            'status': 'queued',
+            'result': None,
+            'http_status': None,
+            'created_at': now,
+            'finished_at': None
+        }
+    _executor.submit(_run, job_id, fn, args)
+    return job_id
+
+def get_job(job_id, owner):
+    """Public view of a job, or None if it doesn't exist (or belongs to someone else)."""
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None or job['owner'] != owner:
+            return None
+        return {k: v for k, v in job.items() if k != 'owner'}
+
+def get_queue_stats():
+    with _lock:
+        statuses = [job['status'] for job in _jobs.values()]
+    return {s: statuses.count(s) for s in ('queued', 'running', 'done')}
@@ -0,0 +1,38 @@
+import os
+import sys
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.applicant_counter import backfill_counter, COUNTER_FLAG
+
+# One-off: switches on the sharded applicant counter of every drive created before it existed.
+# Safe to re-run and to run while students are applying (each drive is one transaction).
+#   python utils/migrate_applicant_counters.py --dry-run
+
+def migrate(db, dry_run=False):
+    done = total = 0
+    for doc in db.collection('placement_drives').stream():
+        total += 1
+        if (doc.to_dict() or {}).get(COUNTER_FLAG): continue
+        if dry_run:
+            print(f"   - {doc.id}: would be backfilled")
+            done += 1
+            continue
+        count = backfill_counter(db, doc.id)
+        if count is not None:
+            print(f"   - {doc.id}: {count} applicants")
+            done += 1
+    print(f"✅ {done}/{total} drives {'would be ' if dry_run else ''}backfilled")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill sharded applicant counters for existing drives.")
+    parser.add_argument('--dry-run', action='store_true', help="List the drives without writing")
+    args = parser.parse_args()
+
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(credentials.Certificate("firebase-key.json"))
+
+    print("🔢 Backfilling applicant counters...")
+    migrate(firestore.client(), args.dry_run)
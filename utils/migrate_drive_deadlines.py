@@ -0,0 +1,66 @@
+import os
+import sys
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.drive_deadlines import normalize_deadline, today_start
+
+# One-off rewrite of placement drives saved before deadlines were normalized:
+# string/naive deadlines become midnight-UTC timestamps, missing statuses become 'active'
+# and missing created_at (needed by the paginated drives list) is taken from the document's create time.
+#   python utils/migrate_drive_deadlines.py --dry-run
+#   python utils/migrate_drive_deadlines.py --close-expired
+
+BATCH_SIZE = 400  # Firestore allows 500 writes per batch
+
+def migrate(db, dry_run=False, close_expired=False):
+    batch = db.batch()
+    pending = changed = total = 0
+    cutoff = today_start()
+
+    for doc in db.collection('placement_drives').stream():
+        total += 1
+        data = doc.to_dict() or {}
+        raw = data.get('deadline')
+        deadline = normalize_deadline(raw)
+        if raw and deadline is None:
+            print(f"   - ⚠️ {doc.id}: unparseable deadline {raw!r}, stored as None")
+
+        update = {}
+        if deadline != raw or 'deadline' not in data:  # Explicit None so open-ended drives are queryable
+            update['deadline'] = deadline
+        status = data.get('status') or 'active'
+        if close_expired and status == 'active' and deadline and deadline < cutoff:
+            status = 'closed'
+        if status != data.get('status'):
+            update['status'] = status
+        if not data.get('created_at'):
+            update['created_at'] = doc.create_time
+        if not update: continue
+
+        changed += 1
+        print(f"   - {doc.id}: {update}")
+        if dry_run: continue
+        batch.update(doc.reference, update)
+        pending += 1
+        if pending >= BATCH_SIZE:
+            batch.commit()
+            batch, pending = db.batch(), 0
+
+    if pending and not dry_run:
+        batch.commit()
+    print(f"✅ {changed}/{total} drives {'would be ' if dry_run else ''}updated")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Normalize placement drive deadlines to timestamps.")
+    parser.add_argument('--dry-run', action='store_true', help="Print the changes without writing them")
+    parser.add_argument('--close-expired', action='store_true', help="Also set status 'closed' on drives past their deadline")
+    args = parser.parse_args()
+
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(credentials.Certificate("firebase-key.json"))
+
+    print("📅 Normalizing drive deadlines...")
+    migrate(firestore.client(), args.dry_run, args.close_expired)
@@ -0,0 +1,102 @@
+import base64
+from firebase_admin import firestore
+
+# Cursor pagination for list pages and chat history.
+# Every list used to stream a whole collection (or a whole conversation). Lists now
+# read one page at a time with Firestore start_after cursors, so response size and
+# latency don't depend on how much data has piled up.
+# The page token handed to clients is an opaque url-safe string. It encodes the
+# path of the last document on the page, and the next page resumes after that
+# document's snapshot, so any order_by on the query keeps working.
+
+# --- CONFIG ---
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+MESSAGES_PAGE_SIZE = 50
+FILTER_BATCH_SIZE = 50     # Documents read per round trip when filtering in Python
+MAX_FILTER_SCAN = 2000     # Most documents one filtered page may read before returning what it has
+
+def encode_token(snapshot):
+    return base64.urlsafe_b64encode(snapshot.reference.path.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_token(token):
+    """Document path from a page token, or None if it's malformed."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        return base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+    except (ValueError, UnicodeError):
+        return None
+
+def page_size_arg(value, default=DEFAULT_PAGE_SIZE):
+    """Clamps a client-supplied page size to 1..MAX_PAGE_SIZE."""
+    try:
+        return max(1, min(MAX_PAGE_SIZE, int(value)))
+    except (TypeError, ValueError):
+        return default
+
+def _resume(db, query, page_token):
+    """The query positioned after the page token's document (unchanged if there's no usable token)."""
+    path = decode_token(page_token) if page_token else None
+    if path:
+        try:
+            cursor = db.document(path).get()
+            if cursor.exists:
+                query = query.start_after(cursor)
+        except Exception as e:
+            print(f"⚠️ Ignoring bad page token: {e}")  # Not a document path
+    return query
+
+def paginate(db, query, page_token=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    (snapshots, next_page_token) for one page of the query.
+    next_page_token is None on the last page. A token that is malformed, or whose
+    document no longer exists, restarts from the first page.
+    """
+    query = _resume(db, query, page_token)
+
+    # One extra document tells us whether another page exists
+    docs = list(query.limit(page_size + 1).stream())
+    if len(docs) > page_size:
+        return docs[:page_size], encode_token(docs[page_size - 1])
+    return docs, None
+
+def paginate_filtered(db, query, keep, page_token=None, page_size=DEFAULT_PAGE_SIZE, max_scan=MAX_FILTER_SCAN):
+    """
+    Like paginate, for filters Firestore can't express: only snapshots where keep(snapshot)
+    is true fill the page. Reads further batches until page_size matches are found, the
+    query runs out, or max_scan documents were read. The token resumes after the last
+    document read, so nothing is skipped or shown twice.
+    """
+    query = _resume(db, query, page_token)
+    matches, scanned = [], 0
+    while True:
+        batch = list(query.limit(FILTER_BATCH_SIZE).stream())
+        for i, doc in enumerate(batch):
+            scanned += 1
+            if keep(doc): matches.append(doc)
+            if len(matches) >= page_size or scanned >= max_scan:
+                more = i < len(batch) - 1 or len(batch) == FILTER_BATCH_SIZE
+                return matches, encode_token(doc) if more else None
+        if len(batch) < FILTER_BATCH_SIZE:
+            return matches, None
+        query = query.start_after(batch[-1])
+
+def message_page(db, conv_id, page_token=None, page_size=MESSAGES_PAGE_SIZE):
+    """
+    {messages, next_page_token} for a conversation: the newest page_size messages,
+    oldest first for display. next_page_token loads the page of older messages before them.
+    """
+    query = db.collection('conversations').document(conv_id).collection('messages')\
+              .order_by('timestamp', direction=firestore.Query.DESCENDING)
+    docs, next_token = paginate(db, query, page_token, page_size)
+
+    messages = []
+    for m in reversed(docs):
+        d = m.to_dict()
+        # Map 'content' (DB) back to 'message' (Frontend expectation)
+        messages.append({
+            'sender_id': d.get('sender_id'),
+            'message': d.get('content'),
+            'timestamp': d.get('timestamp')
+        })
+    return {'messages': messages, 'next_page_token': next_token}
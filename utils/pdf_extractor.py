@@ -0,0 +1,66 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from PyPDF2 import PdfReader
+
+# Pages handed to a worker at a time. Each task re-opens the PDF,
+# so very small ranges waste time re-parsing the file.
+PAGES_PER_TASK = 8
+
+def _extract_page_range(task):
+    """Worker: extracts pages [first, last) of one PDF. Runs in a child process."""
+    pdf_path, first, last = task
+    try:
+        reader = PdfReader(pdf_path)
+    except Exception as e:
+        print(f"   - ⚠️ Could not open {os.path.basename(pdf_path)}: {e}")
+        return pdf_path, []
+
+    pages = []
+    for page_no in range(first, last):
+        try:
+            text = reader.pages[page_no].extract_text() or ""
+        except Exception as e:
+            print(f"   - ⚠️ {os.path.basename(pdf_path)} page {page_no + 1}: {e}")
+            text = ""
+        pages.append((page_no + 1, text))
+    return pdf_path, pages
+
+def _page_tasks(pdf_paths):
+    for pdf_path in pdf_paths:
+        try:
+            page_count = len(PdfReader(pdf_path).pages)
+        except Exception as e:
+            print(f"   - ⚠️ Skipped {os.path.basename(pdf_path)}: {e}")
+            continue
+        for first in range(0, page_count, PAGES_PER_TASK):
+            yield (pdf_path, first, min(first + PAGES_PER_TASK, page_count))
+
+def _to_records(result):
+    pdf_path, pages = result
+    source = os.path.basename(pdf_path)
+    for page_no, text in pages:
+        yield {'source': source, 'path': pdf_path, 'page': page_no, 'text': text}
+
+def iter_pdf_pages(pdf_paths, workers=None):
+    """
+    Yields {'source', 'path', 'page', 'text'} for every page of every PDF, in document order.
+    Pages are extracted across a process pool; only a few tasks are in flight at once,
+    so memory stays bounded no matter how large the PDFs are.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = _page_tasks(pdf_paths)
+
+    if workers <= 1:
+        for task in tasks:
+            yield from _to_records(_extract_page_range(task))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for task in tasks:
+            in_flight.append(pool.submit(_extract_page_range, task))
+            if len(in_flight) >= workers * 2:
+                yield from _to_records(in_flight.popleft().result())
+        while in_flight:
+            yield from _to_records(in_flight.popleft().result())
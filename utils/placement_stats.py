@@ -0,0 +1,118 @@
+import os
+import sys
+from firebase_admin import firestore
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.firestore_repo import count_query
+from utils.drive_deadlines import count_active_drives
+
+# Materialized counters for the placement and HOD dashboards.
+# The dashboards used to stream every student, CSA, batch and drive just to len() them.
+# The totals now live in one document, system_stats/placement_stats. Each write path
+# keeps it current with firestore.Increment, so a dashboard costs a single read.
+# Active drives are the exception: drives expire without any write, so that number
+# is a live count() aggregation instead of a counter.
+# A missing document is seeded from Firestore count() aggregations. Rebuild it
+# at any time (e.g. after bulk imports) with:
+#   python utils/placement_stats.py
+
+# --- CONFIG ---
+STATS_COLLECTION = 'system_stats'
+STATS_DOC = 'placement_stats'
+COUNTERS = ('students', 'placed_students', 'csa', 'batches')
+ROLE_COUNTERS = {'student': 'students', 'csa': 'csa'}
+
+def _stats_ref(db):
+    return db.collection(STATS_COLLECTION).document(STATS_DOC)
+
+def _queries(db):
+    users = db.collection('users')
+    return {
+        'students': users.where('role', '==', 'student'),
+        # Placed = is_placed or placement_status == 'placed'; recompute_stats backfills is_placed first
+        'placed_students': users.where('role', '==', 'student').where('is_placed', '==', True),
+        'csa': users.where('role', '==', 'csa'),
+        'batches': db.collection('batches'),
+    }
+
+def _backfill_is_placed(db):
+    """Sets is_placed on students marked placed only through placement_status (before the flag existed)."""
+    placed = db.collection('users').where('role', '==', 'student').where('placement_status', '==', 'placed')
+    batch, pending = db.batch(), 0
+    for doc in placed.select(['is_placed']).stream():
+        if (doc.to_dict() or {}).get('is_placed') == True: continue
+        batch.update(doc.reference, {'is_placed': True})
+        pending += 1
+        if pending >= 400:  # Firestore allows 500 writes per batch
+            batch.commit()
+            batch, pending = db.batch(), 0
+    if pending:
+        batch.commit()
+
+def recompute_stats(db):
+    """Counts everything with aggregation queries and overwrites the stats document."""
+    _backfill_is_placed(db)
+    stats = {name: count_query(query) for name, query in _queries(db).items()}
+    _stats_ref(db).set(dict(stats, recomputed_at=firestore.SERVER_TIMESTAMP))
+    return stats
+
+def get_stats(db):
+    """{counter: value} for every counter plus active_drives. Reads one document; seeds it on first use."""
+    try:
+        doc = _stats_ref(db).get()
+        data = (doc.to_dict() or {}) if doc.exists else {}
+        if all(name in data for name in COUNTERS):
+            stats = {name: max(0, int(data[name] or 0)) for name in COUNTERS}
+        else:
+            stats = recompute_stats(db)
+    except Exception as e:
+        print(f"⚠️ Placement stats unavailable: {e}")
+        stats = {name: 0 for name in COUNTERS}
+    try:
+        stats['active_drives'] = count_active_drives(db)
+    except Exception as e:
+        print(f"⚠️ Active drive count unavailable: {e}")
+        stats['active_drives'] = 0
+    return stats
+
+def increment(db, counter, amount=1):
+    """Adds amount to one counter. Failures are logged, never raised into the request."""
+    try:
+        _stats_ref(db).set({counter: firestore.Increment(amount),
+                            'updated_at': firestore.SERVER_TIMESTAMP}, merge=True)
+    except Exception as e:
+        print(f"⚠️ Stats increment failed ({counter} {amount:+d}): {e}")
+
+def _is_placed(student):
+    return student.get('is_placed') == True or student.get('placement_status') == 'placed'
+
+@firestore.transactional
+def _mark_placed(transaction, db, student_ref):
+    already_placed = _is_placed(student_ref.get(transaction=transaction).to_dict() or {})
+    transaction.update(student_ref, {'placement_status': 'placed', 'is_placed': True})
+    if not already_placed:
+        transaction.set(_stats_ref(db), {'placed_students': firestore.Increment(1),
+                                         'updated_at': firestore.SERVER_TIMESTAMP}, merge=True)
+    return not already_placed
+
+def mark_placed(db, student_id):
+    """
+    Marks a student placed and counts them, in one transaction so a double click or
+    two approvers can't count the same student twice. True if they weren't placed before.
+    """
+    return _mark_placed(db.transaction(), db, db.collection('users').document(student_id))
+
+def count_user(db, role, amount=1):
+    """Counts a created (+1) or deleted (-1) user of the given role, if that role is tracked."""
+    if role in ROLE_COUNTERS:
+        increment(db, ROLE_COUNTERS[role], amount)
+
+if __name__ == "__main__":
+    import firebase_admin
+    from firebase_admin import credentials
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(credentials.Certificate("firebase-key.json"))
+
+    print("📊 Recomputing placement stats...")
+    for name, value in recompute_stats(firestore.client()).items():
+        print(f"   - {name}: {value}")
@@ -0,0 +1,110 @@
+import os
+import sys
+import json
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.resume_analyzer import iter_resume_analyses, job_description_for_drive
+from utils.firestore_repo import get_docs_by_ids
+from utils.resume_extractor import RESUME_TEXT_FIELD
+
+# Ranks every applicant of a placement drive by resume fit, using the text of the
+# resume each student last ran through the Resume Analyzer (saved on their user
+# document, see resume_extractor.RESUME_TEXT_FIELD). Students who never did are listed last.
+#   python utils/rank_applicants.py <drive_id>
+#   python utils/rank_applicants.py <drive_id> --workers 4 --json > ranking.ndjson
+# Worker processes (--workers) are for this CLI only. The web route scores with
+# score_applicants in-process: forking spaCy workers inside Flask while Firestore
+# gRPC channels are open is unsafe.
+
+# --- CONFIG ---
+RANK_WORKERS = max(1, min(4, os.cpu_count() or 1))
+MIN_PARALLEL_RESUMES = 32  # Below this, starting worker processes costs more than it saves
+NO_RESUME_SUMMARY = "No resume on file. The student hasn't run the Resume Analyzer yet."
+
+def load_applicants(db, drive_id):
+    """(drive, applicants) for a drive, or (None, []) if it doesn't exist."""
+    drive_ref = db.collection('placement_drives').document(drive_id)
+    drive = drive_ref.get()
+    if not drive.exists: return None, []
+
+    applicant_docs = list(drive_ref.collection('applicants').stream())
+    users = get_docs_by_ids(db, 'users', [doc.id for doc in applicant_docs],
+                            field_paths=['full_name', 'email', 'cgpa', RESUME_TEXT_FIELD])
+
+    applicants = []
+    for doc in applicant_docs:
+        student = users.get(doc.id, {})
+        applicants.append({
+            'student_id': doc.id,
+            'name': student.get('full_name', 'Unknown'),
+            'email': student.get('email', 'N/A'),
+            'cgpa': student.get('cgpa', 'N/A'),
+            'status': (doc.to_dict() or {}).get('status', 'applied'),
+            'resume_text': student.get(RESUME_TEXT_FIELD) or ''
+        })
+    return drive.to_dict(), applicants
+
+def score_applicants(drive, applicants, workers=1):
+    """
+    Yields (applicant, result) as each resume is scored, in input order. result is
+    None for applicants without resume text, which come last.
+    """
+    with_text = [a for a in applicants if a['resume_text'].strip()]
+    without_text = [a for a in applicants if not a['resume_text'].strip()]
+
+    n_process = workers if workers > 1 and len(with_text) >= MIN_PARALLEL_RESUMES else 1
+    results = iter_resume_analyses([a['resume_text'] for a in with_text],
+                                   job_description_for_drive(drive), n_process=n_process)
+    for applicant, result in zip(with_text, results):
+        yield applicant, result
+    for applicant in without_text:
+        yield applicant, None
+
+def rank_applicants(drive, applicants, workers=None):
+    """
+    Scores all applicants against the drive in one batch and yields result rows,
+    best first. Applicants without resume text come last with score None.
+    """
+    scored, unscored = [], []
+    for applicant, result in score_applicants(drive, applicants, workers or RANK_WORKERS):
+        if result is None: unscored.append(applicant)
+        else: scored.append((applicant, result))
+
+    scored.sort(key=lambda pair: pair[1]['score'], reverse=True)
+    for rank, (applicant, result) in enumerate(scored, start=1):
+        yield _row(applicant, rank, result['score'], result['summary'])
+    for applicant in unscored:
+        yield _row(applicant, None, None, NO_RESUME_SUMMARY)
+
+def _row(applicant, rank, score, summary):
+    row = {k: v for k, v in applicant.items() if k != 'resume_text'}
+    row.update(rank=rank, score=score, summary=summary)
+    return row
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank a placement drive's applicants by resume fit.")
+    parser.add_argument('drive_id')
+    parser.add_argument('--workers', type=int, default=RANK_WORKERS, help="spaCy worker processes")
+    parser.add_argument('--json', action='store_true', help="Print NDJSON rows instead of a table")
+    args = parser.parse_args()
+
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(credentials.Certificate("firebase-key.json"))
+
+    drive, applicants = load_applicants(firestore.client(), args.drive_id)
+    if drive is None:
+        sys.exit(f"❌ Drive '{args.drive_id}' not found")
+
+    if not args.json:
+        print(f"🏁 {drive.get('company_name')} – {drive.get('role_title')}: {len(applicants)} applicants")
+        print(f"{'#':>3}  {'score':>5}  {'name':<30} email")
+    for row in rank_applicants(drive, applicants, args.workers):
+        if args.json:
+            print(json.dumps(row, default=str))
+        else:
+            rank = row['rank'] or '-'
+            score = '-' if row['score'] is None else row['score']
+            print(f"{rank:>3}  {score:>5}  {row['name']:<30} {row['email']}")
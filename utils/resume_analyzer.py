@@ -1,29 +1,147 @@
-import spacy
+import os
 import re
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+import spacy
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 
-# Load the NLP model once when the server starts
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    print("Downloading English model for spaCy...")
-    from spacy.cli import download
-    download("en_core_web_sm")
-    nlp = spacy.load("en_core_web_sm")
+# --- NLP MODEL (lazy singleton) ---
+# The analyzer only reads POS tags (token.tag_) and named entities, so the parser,
+# lemmatizer and rule components are never loaded. That makes loading and every
+# nlp() call much cheaper.
+NLP_MODEL = "en_core_web_sm"
+NLP_EXCLUDE = ["parser", "attribute_ruler", "lemmatizer", "senter"]
+
+_nlp = None
+_nlp_lock = threading.Lock()
+
+def _load_nlp():
+    # The model is an install step (requirements.txt), never downloaded on a request
+    try:
+        return spacy.load(NLP_MODEL, exclude=NLP_EXCLUDE)
+    except OSError as e:
+        raise RuntimeError(f"spaCy model '{NLP_MODEL}' is not installed. "
+                           f"Run: pip install -r requirements.txt (or python -m spacy download {NLP_MODEL})") from e
+
+def get_nlp():
+    """The trimmed spaCy pipeline, loaded on first use and shared by every request."""
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                _nlp = _load_nlp()
+                print(f"🧠 Resume NLP ready ({', '.join(_nlp.pipe_names)})")
+    return _nlp
+
+def warm_up_nlp():
+    """Loads the model in a background thread so the first resume doesn't wait for it."""
+    def _warm():
+        try:
+            get_nlp()("Warm up.")
+        except Exception as e:
+            print(f"⚠️ Resume NLP warm-up failed: {e}")
+    threading.Thread(target=_warm, name="resume-nlp-warmup", daemon=True).start()
+
+# --- KEYWORD MODEL (pre-fitted TF-IDF) ---
+# IDF fitted offline on real resumes + job descriptions (utils/build_resume_model.py),
+# so scoring a resume is one transform and a sparse dot product. Job-description
+# vectors are cached, since every applicant of a drive is scored against the same one.
+TFIDF_MODEL_PATH = os.path.join("models", "resume_tfidf.pkl")
+MAX_JD_VECTORS = 128
+
+DEFAULT_JOB_DESCRIPTION = """
+        Software Engineer required. Experience in Python, Flask, JavaScript, HTML, CSS.
+        Strong understanding of Data Structures, Algorithms, SQL, databases, and Git.
+        Machine Learning, NLP, Firebase, and TailwindCSS are a plus.
+        """
+
+_tfidf = {'vectorizer': None, 'mtime': None}
+_jd_vectors = OrderedDict()
+_tfidf_lock = threading.Lock()
+
+def get_tfidf_model():
+    """The pre-fitted vectorizer (reloaded when the file changes), or None if it hasn't been built."""
+    try:
+        mtime = os.stat(TFIDF_MODEL_PATH).st_mtime_ns
+    except OSError:
+        return None
+    if mtime != _tfidf['mtime']:
+        with _tfidf_lock:
+            if mtime != _tfidf['mtime']:
+                try:
+                    with open(TFIDF_MODEL_PATH, 'rb') as f:
+                        model = pickle.load(f)
+                except Exception as e:
+                    print(f"⚠️ Could not load resume TF-IDF model: {e}")
+                    return _tfidf['vectorizer']
+                _tfidf['vectorizer'] = model['vectorizer']
+                _tfidf['mtime'] = mtime
+                _jd_vectors.clear()
+                print(f"📐 Resume TF-IDF model loaded ({model.get('documents', '?')} documents)")
+    return _tfidf['vectorizer']
+
+def scoring_version():
+    """Identifies the TF-IDF model in use, so cached analyses are dropped when it is rebuilt."""
+    get_tfidf_model()
+    return str(_tfidf['mtime'] or 'two-document')
+
+def job_description_vector(vectorizer, job_description):
+    """TF-IDF vector of a job description, cached by its text (an edited drive gets a new entry)."""
+    key = hashlib.sha1(job_description.encode('utf-8')).hexdigest()
+    with _tfidf_lock:
+        vector = _jd_vectors.get(key)
+        if vector is not None:
+            _jd_vectors.move_to_end(key)
+            return vector
+    vector = vectorizer.transform([job_description])
+    with _tfidf_lock:
+        _jd_vectors[key] = vector
+        while len(_jd_vectors) > MAX_JD_VECTORS:
+            _jd_vectors.popitem(last=False)
+    return vector
+
+def keyword_similarity(resume_text, job_description):
+    """Cosine similarity of resume and job description in TF-IDF space."""
+    vectorizer = get_tfidf_model()
+    if vectorizer is None:
+        # No offline model yet: fit on just these two documents (the original behaviour)
+        tfidf_matrix = TfidfVectorizer(stop_words='english').fit_transform([resume_text, job_description])
+        return cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
 
-def analyze_resume_custom(resume_text, target_job_description=None):
+    # Rows are L2-normalized, so the dot product is the cosine
+    resume_vector = vectorizer.transform([resume_text])
+    return (resume_vector @ job_description_vector(vectorizer, job_description).T)[0, 0]
+
+def keyword_similarities(resume_texts, job_description):
+    """
+    Similarity of N resumes to one job description in a single sparse product
+    (N x vocab times vocab x 1) instead of N separate comparisons.
+    """
+    vectorizer = get_tfidf_model()
+    if vectorizer is None:
+        # No offline model: fit once on this batch plus the JD
+        matrix = TfidfVectorizer(stop_words='english').fit_transform(list(resume_texts) + [job_description])
+        return (matrix[:-1] @ matrix[-1].T).toarray().ravel()
+    resume_matrix = vectorizer.transform(resume_texts)
+    return (resume_matrix @ job_description_vector(vectorizer, job_description).T).toarray().ravel()
+
+def job_description_for_drive(drive):
+    """Scoring target for a placement drive document: role title + description."""
+    text = f"{drive.get('role_title') or ''}\n{drive.get('description') or ''}".strip()
+    return text or None
+
+def analyze_resume_custom(resume_text, target_job_description=None, doc=None, similarity=None):
     """
     Analyzes resume text against a target job description using NLP, ML, and Regex.
     Returns a dictionary matching the schema expected by the frontend.
+    doc (parsed spaCy Doc) and similarity (keyword match) can be precomputed by batch scoring.
     """
     if not target_job_description:
         # Default target if none is provided
-        target_job_description = """
-        Software Engineer required. Experience in Python, Flask, JavaScript, HTML, CSS.
-        Strong understanding of Data Structures, Algorithms, SQL, databases, and Git.
-        Machine Learning, NLP, Firebase, and TailwindCSS are a plus.
-        """
+        target_job_description = DEFAULT_JOB_DESCRIPTION
 
     score = 0
     strengths = []
@@ -32,9 +150,9 @@ def analyze_resume_custom(resume_text, target_job_description=None):
     
     # --- PILLAR 1: Machine Learning (TF-IDF & Cosine Similarity) [Max 40 pts] ---
     try:
-        vectorizer = TfidfVectorizer(stop_words='english')
-        tfidf_matrix = vectorizer.fit_transform([resume_text, target_job_description])
-        similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
+        if similarity is None:
+            similarity = keyword_similarity(resume_text, target_job_description)
+        similarity = float(similarity)
         
         ml_score = min(40, int(similarity * 100))
         score += ml_score
@@ -48,7 +166,8 @@ def analyze_resume_custom(resume_text, target_job_description=None):
         print(f"ML Processing error: {e}")
 
     # --- PILLAR 2: NLP (SpaCy Entity & Verb Analysis) [Max 30 pts] ---
-    doc = nlp(resume_text)
+    if doc is None:
+        doc = get_nlp()(resume_text)
     
     # Action Verbs (VBD = past tense, VBG = gerund)
     action_verbs = [token.text for token in doc if token.tag_ in ['VBD', 'VBG']]
@@ -106,4 +225,31 @@ def analyze_resume_custom(resume_text, target_job_description=None):
         "strengths": strengths,
         "weaknesses": weaknesses,
         "suggestions": suggestions
-    }
\ No newline at end of file
+    }
+
+def analyze_resumes(resume_texts, target_job_description=None, n_process=1, batch_size=16):
+    """
+    Batch version of analyze_resume_custom: one vectorized keyword comparison for all
+    resumes, and nlp.pipe (optionally across n_process worker processes) for the parsing.
+    Returns one result per text, in input order.
+    """
+    return list(iter_resume_analyses(resume_texts, target_job_description, n_process, batch_size))
+
+def iter_resume_analyses(resume_texts, target_job_description=None, n_process=1, batch_size=16):
+    """
+    Like analyze_resumes, but yields each result as soon as its resume is parsed.
+    Keep n_process=1 inside the web server: spaCy forks worker processes, and
+    forking with open Firestore gRPC channels can hang or corrupt them.
+    """
+    resume_texts = list(resume_texts)
+    if not resume_texts: return
+    target_job_description = target_job_description or DEFAULT_JOB_DESCRIPTION
+    try:
+        similarities = keyword_similarities(resume_texts, target_job_description)
+    except Exception as e:
+        print(f"ML Processing error: {e}")
+        similarities = [None] * len(resume_texts)
+
+    docs = get_nlp().pipe(resume_texts, n_process=n_process, batch_size=batch_size)
+    for text, doc, sim in zip(resume_texts, docs, similarities):
+        yield analyze_resume_custom(text, target_job_description, doc=doc, similarity=sim)
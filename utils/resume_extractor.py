@@ -0,0 +1,49 @@
+import io
+import hashlib
+from pypdf import PdfReader
+from utils import ai_cache
+
+# Text extraction for uploaded resumes. Students re-upload the same PDF many times
+# while iterating, so the extracted text is cached under the SHA-256 of the bytes
+# (SQLite, LRU, see ai_cache). Size and page limits keep one huge PDF from tying
+# up a worker.
+# The text of each student's latest analyzed resume is also kept on their user
+# document (RESUME_TEXT_FIELD). Drive ranking and the TF-IDF model build read it from
+# there; profiles only hold a resume_url link, which can't be parsed.
+
+# --- CONFIG ---
+MAX_RESUME_BYTES = 5 * 1024 * 1024
+MAX_RESUME_PAGES = 10
+RESUME_TEXT_FIELD = 'resume_text_content'
+MAX_STORED_RESUME_CHARS = 100000  # Well under Firestore's 1 MB document limit
+
+def resume_digest(pdf_bytes):
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+def extract_resume_text(pdf_bytes, digest=None):
+    """
+    Returns (text, None) or (None, (error_message, http_status)).
+    Cached by file hash, so a re-upload of the same PDF skips parsing entirely.
+    """
+    if len(pdf_bytes) > MAX_RESUME_BYTES:
+        return None, (f"Resume is too large (max {MAX_RESUME_BYTES // (1024 * 1024)} MB).", 413)
+
+    digest = digest or resume_digest(pdf_bytes)
+    text = ai_cache.get('resume_text', digest)
+    if text is not None:
+        return text, None
+
+    try:
+        pdf_reader = PdfReader(io.BytesIO(pdf_bytes))
+        if len(pdf_reader.pages) > MAX_RESUME_PAGES:
+            return None, (f"Resume has too many pages (max {MAX_RESUME_PAGES}).", 400)
+        text = "".join((page.extract_text() or "") + "\n" for page in pdf_reader.pages)
+    except Exception as e:
+        print(f"PDF Extraction Error: {e}")
+        return None, ("Could not analyze PDF. Ensure it is a valid text-based PDF.", 400)
+
+    if not text.strip():
+        return None, ("No text found in the PDF. Scanned resumes are not supported.", 400)
+
+    ai_cache.put('resume_text', digest, text)
+    return text, None
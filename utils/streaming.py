@@ -0,0 +1,51 @@
+import json
+
+# Helpers for the Server-Sent Events endpoints (chat, summarizer, interview feedback).
+# Each event is "event: <name>\ndata: <json>\n\n"; the browser reads them with fetch().
+
+def sse_event(data, event='message'):
+    """One SSE frame. data is JSON-encoded so newlines in model output survive."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no'  # Stop nginx-style proxies from buffering the whole response
+}
+
+_decoder = json.JSONDecoder()
+
+def _skip_ws(text, pos):
+    while pos < len(text) and text[pos] in ' \t\r\n':
+        pos += 1
+    return pos
+
+def completed_json_fields(text):
+    """
+    Incremental parse of a JSON object that is still being streamed (markdown fences allowed).
+    Returns the top-level key/value pairs whose values are already complete, so callers
+    can forward e.g. "score" long before "model_answer" has finished generating.
+    """
+    fields = {}
+    pos = text.find('{')
+    if pos == -1: return fields
+    pos += 1
+
+    while True:
+        pos = _skip_ws(text, pos)
+        if pos < len(text) and text[pos] == ',':
+            pos = _skip_ws(text, pos + 1)
+        if pos >= len(text) or text[pos] != '"':
+            return fields
+        try:
+            key, pos = _decoder.raw_decode(text, pos)
+            pos = _skip_ws(text, pos)
+            if pos >= len(text) or text[pos] != ':':
+                return fields
+            value, end = _decoder.raw_decode(text, _skip_ws(text, pos + 1))
+        except ValueError:
+            return fields  # Value still arriving
+        # A number at the very end of the buffer may still be growing ("8" -> "85")
+        if end == len(text) and isinstance(value, (int, float)):
+            return fields
+        fields[key] = value
+        pos = end
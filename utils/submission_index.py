@@ -0,0 +1,48 @@
+from firebase_admin import firestore
+
+# Submission-status index for assignments.
+# Each assignment document carries `submitted_student_ids`, which is kept up to date
+# in the same transaction that writes the submission. "Who has submitted
+# task X" then comes with the task document itself, instead of one
+# submissions/{student_id} read per student.
+# Tasks created before the index existed fall back to one ids-only read of their
+# submissions subcollection. That read also backfills the field.
+
+SUBMITTED_FIELD = 'submitted_student_ids'
+
+@firestore.transactional
+def _record(transaction, task_ref, student_id, sub_data):
+    task_data = task_ref.get(transaction=transaction).to_dict() or {}
+    if SUBMITTED_FIELD in task_data:
+        submitted = firestore.ArrayUnion([student_id])
+    else:
+        # Legacy task: seed the index with everyone who submitted before it existed,
+        # otherwise the field would list only this student from now on
+        earlier = {doc.id for doc in transaction.get(task_ref.collection('submissions').select([]))}
+        submitted = sorted(earlier | {student_id})
+    transaction.set(task_ref.collection('submissions').document(student_id), sub_data)
+    transaction.update(task_ref, {SUBMITTED_FIELD: submitted})
+
+def record_submission(db, task_id, student_id, sub_data):
+    """Writes the submission and adds the student to the task's submitted set atomically."""
+    task_ref = db.collection('assignments').document(task_id)
+    _record(db.transaction(), task_ref, student_id, sub_data)
+
+def submitted_ids(db, task_id, task_data=None):
+    """Set of student IDs who submitted the task."""
+    if task_data is not None and SUBMITTED_FIELD in task_data:
+        return set(task_data[SUBMITTED_FIELD] or [])
+
+    # Legacy task: one query for document IDs only, then backfill the index
+    task_ref = db.collection('assignments').document(task_id)
+    ids = {doc.id for doc in task_ref.collection('submissions').select([]).stream()}
+    try:
+        task_ref.update({SUBMITTED_FIELD: firestore.ArrayUnion(sorted(ids))})
+    except Exception as e:
+        print(f"Submission index backfill failed for {task_id}: {e}")
+    return ids
+
+def submissions_by_student(db, task_id):
+    """{student_id: submission data} for one task, in a single query (for submission tables)."""
+    subs = db.collection('assignments').document(task_id).collection('submissions').stream()
+    return {doc.id: doc.to_dict() or {} for doc in subs}
@@ -0,0 +1,182 @@
+import os
+import time
+import hashlib
+import threading
+from datetime import datetime
+import numpy as np
+import faiss
+from langchain_community.vectorstores import FAISS
+
+# --- CONFIG ---
+INDEX_DIR = "faiss_index"
+INDEX_FILES = ("index.faiss", "index.pkl")
+CHECK_INTERVAL = 5  # Seconds between stat() checks of the index files
+FILTER_FIELDS = ('doc_type', 'source')  # Chunk metadata that retrieval can be restricted by
+FILTERED_EF_SEARCH = 256  # HNSW needs a wider beam when most of the graph is filtered out
+
+# --- PROCESS-WIDE STATE ---
+# The FAISS index is only ever read after loading, and concurrent searches on a
+# CPU index are thread-safe. A rebuild is swapped in by replacing the reference,
+# so request threads never see a half-loaded store.
+_lock = threading.Lock()
+_store = None
+_signature = None
+_last_check = 0.0
+_stats = {
+    'loaded': False,
+    'version': None,
+    'vectors': 0,
+    'size_bytes': 0,
+    'load_seconds': 0.0,
+    'loaded_at': None,
+    'reloads': 0
+}
+# FAISS positions of each metadata subset, built lazily for the store they belong to
+_subsets = {'store': None, 'ids': {}}
+_subsets_lock = threading.Lock()
+
+def _index_signature(index_dir):
+    """Cheap change detector: (name, mtime, size) of each index file, or None if one is missing."""
+    signature = []
+    for name in INDEX_FILES:
+        try:
+            st = os.stat(os.path.join(index_dir, name))
+        except OSError:
+            return None
+        signature.append((name, st.st_mtime_ns, st.st_size))
+    return tuple(signature)
+
+def _hash_index(index_dir):
+    """Content hash of the index files. Only computed when the mtime/size signature changes."""
+    digest = hashlib.sha1()
+    for name in INDEX_FILES:
+        with open(os.path.join(index_dir, name), 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+def _load(embeddings, signature, version):
+    global _store, _signature
+    started = time.perf_counter()
+    store = FAISS.load_local(INDEX_DIR, embeddings, allow_dangerous_deserialization=True)
+    elapsed = time.perf_counter() - started
+
+    is_reload = _store is not None
+    _store = store
+    _signature = signature
+    _stats.update({
+        'loaded': True,
+        'version': version,
+        'vectors': store.index.ntotal,
+        'size_bytes': sum(size for _, _, size in signature),
+        'load_seconds': round(elapsed, 3),
+        'loaded_at': datetime.now().isoformat(timespec='seconds'),
+        'reloads': _stats['reloads'] + (1 if is_reload else 0)
+    })
+    action = "Reloaded" if is_reload else "Loaded"
+    print(f"📚 {action} vector store: {_stats['vectors']} vectors "
+          f"({_stats['size_bytes'] / 1024 / 1024:.1f} MB) in {elapsed:.2f}s")
+
+def _refresh(embeddings):
+    """Reloads the store if the files on disk changed. Caller must hold _lock."""
+    global _signature, _last_check
+    _last_check = time.monotonic()
+
+    signature = _index_signature(INDEX_DIR)
+    if signature is None:
+        if _store is None:
+            raise FileNotFoundError(f"No FAISS index found in '{INDEX_DIR}'")
+        return  # Index is being rebuilt; keep serving the one in memory
+    if signature == _signature:
+        return
+
+    version = _hash_index(INDEX_DIR)
+    if version == _stats['version']:
+        _signature = signature  # Touched but not changed
+        return
+
+    try:
+        _load(embeddings, signature, version)
+    except Exception as e:
+        if _store is None: raise
+        print(f"⚠️ Vector store reload failed, keeping previous index: {e}")
+
+def get_vector_store(embeddings):
+    """
+    Returns the shared FAISS store, loading it on first use.
+    Hot-swaps to a new index when the files in INDEX_DIR change.
+    """
+    if _store is not None and time.monotonic() - _last_check < CHECK_INTERVAL:
+        return _store
+
+    if _store is None:
+        with _lock:
+            if _store is None:
+                _refresh(embeddings)
+        return _store
+
+    # Only one thread checks the disk; the rest keep using the current index
+    if _lock.acquire(blocking=False):
+        try:
+            _refresh(embeddings)
+        finally:
+            _lock.release()
+    return _store
+
+def get_index_version():
+    """Content hash of the loaded index (None until loaded). Changes on every rebuild."""
+    return _stats['version']
+
+def get_index_stats():
+    """Load time, size and freshness of the in-memory index."""
+    return dict(_stats)
+
+# --- FILTERED RETRIEVAL ---
+def _subset_ids(vector_store, filters):
+    """FAISS positions of the chunks whose metadata matches every filter. Cached per loaded store."""
+    key = tuple(sorted(filters.items()))
+    with _subsets_lock:
+        if _subsets['store'] is not vector_store:
+            _subsets['store'] = vector_store
+            _subsets['ids'] = {}
+        ids = _subsets['ids'].get(key)
+        if ids is None:
+            docstore = vector_store.docstore
+            ids = np.array([
+                position for position, doc_id in vector_store.index_to_docstore_id.items()
+                if all(docstore.search(doc_id).metadata.get(f) == v for f, v in filters.items())
+            ], dtype=np.int64)
+            _subsets['ids'][key] = ids
+        return ids
+
+def _search_params(index, selector):
+    """FAISS requires the parameter class that matches the index type."""
+    if isinstance(index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=max(index.hnsw.efSearch, FILTERED_EF_SEARCH))
+    if isinstance(index, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=index.nprobe)
+    return faiss.SearchParameters(sel=selector)
+
+def search(vector_store, query_vector, k=4, **filters):
+    """
+    Top-k chunks for a query vector, optionally restricted to chunks whose metadata
+    matches the given filters (e.g. doc_type='syllabus'). Filtered searches only
+    score the matching subset of the index instead of post-filtering the whole store.
+    """
+    filters = {f: v for f, v in filters.items() if f in FILTER_FIELDS and v}
+    if not filters:
+        return vector_store.similarity_search_by_vector(query_vector, k=k)
+
+    ids = _subset_ids(vector_store, filters)
+    if len(ids) == 0:
+        return []
+
+    selector = faiss.IDSelectorBatch(ids)
+    query = np.array([query_vector], dtype=np.float32)
+    _, positions = vector_store.index.search(query, min(k, len(ids)), params=_search_params(vector_store.index, selector))
+
+    docs = []
+    for position in positions[0]:
+        if position == -1: continue
+        docs.append(vector_store.docstore.search(vector_store.index_to_docstore_id[position]))
+    return docs